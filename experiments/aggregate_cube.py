@@ -0,0 +1,116 @@
+"""
+aggregate_cube.py
+
+Purpose:
+Precompute a compact aggregate cube over
+city x neighbourhood x room_type x price band (x has-occupancy flag),
+so charts and reports read a few hundred cells instead of every listing.
+
+Each cell holds counts and sums (revenue, RevPAR, nightly rate, occupancy),
+and the cube keeps quantile sketches (sketches.py) of annual_revenue,
+nightly_rate and revpar per cell. Sketches merge across cells, so any
+roll-up (all of NYC, one room type, ...) gets its percentiles by summing
+buckets: O(cells x buckets), independent of the number of listings.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+import sketches
+from data_access import cached_frame, source_fingerprint, load_comprehensive
+
+# Nightly-rate bands ($). The 500 edge matches the chart 3 "< $500" filter.
+PRICE_BANDS = [0, 100, 200, 300, 500, np.inf]
+CELL_KEYS = ["city", "neighbourhood", "room_type", "price_band", "has_occupancy"]
+SKETCH_METRICS = ["annual_revenue", "nightly_rate", "revpar"]
+# Bump when the cube layout changes so cached cubes are rebuilt
+CUBE_VERSION = 2
+
+class AggregateCube:
+    """Cells (one row per key combination) plus their per-metric bucket counts."""
+
+    def __init__(self, cells, sketches):
+        self.cells = cells
+        self.sketches = sketches
+
+    def select(self, **filters):
+        """Boolean mask over cells, e.g. select(room_type='Private room')."""
+        mask = np.ones(len(self.cells), dtype=bool)
+        for column, value in filters.items():
+            mask &= (self.cells[column] == value).to_numpy()
+        return mask
+
+    def rollup(self, by, mask=None):
+        """Sums cells over everything except `by`; adds mean columns."""
+        cells = self.cells if mask is None else self.cells[mask]
+        out = cells.groupby(by, observed=True)[
+            ["listings", "revenue_sum", "revpar_sum", "nightly_rate_sum", "occupancy_sum"]
+        ].sum().reset_index()
+        out["revenue_mean"] = out["revenue_sum"] / out["listings"]
+        out["revpar_mean"] = out["revpar_sum"] / out["listings"]
+        return out
+
+    def quantile(self, metric, q, mask=None):
+        """
+        q-quantile (scalar or list) of `metric` over the selected cells,
+        within sketches.RELATIVE_ACCURACY of an exact-rank value.
+        """
+        sketch = self.sketches[self.sketches["metric"] == metric]
+        if mask is not None:
+            sketch = sketch[sketch["cell"].isin(self.cells.loc[mask, "cell"])]
+        return sketches.quantile(sketch, q)
+
+def build_cube(df):
+    """Builds the cube from the listing-level export (comprehensive_data)."""
+    bands = pd.cut(df["nightly_rate"], PRICE_BANDS, right=False)
+    df = df.assign(
+        price_band=bands.astype(str),
+        # Upper edge of the band, so callers can filter e.g. band_max <= 500
+        band_max=bands.map(lambda band: band.right).astype(np.float64),
+        has_occupancy=df["occupancy_rate"] > 0,
+    )
+    grouped = df.groupby(CELL_KEYS + ["band_max"], observed=True, sort=True)
+    cells = grouped.agg(
+        listings=("id", "count"),
+        revenue_sum=("annual_revenue", "sum"),
+        revpar_sum=("revpar", "sum"),
+        nightly_rate_sum=("nightly_rate", "sum"),
+        occupancy_sum=("occupancy_rate", "sum"),
+    ).reset_index()
+    cells["revpar_mean"] = cells["revpar_sum"] / cells["listings"]
+    cells["cell"] = np.arange(len(cells), dtype=np.int32)
+
+    # Rows with a missing key belong to no cell (ngroup gives them -1 / NaN)
+    cell_ids = grouped.ngroup().fillna(-1).to_numpy(dtype=np.int64)
+    in_cell = cell_ids >= 0
+    parts = []
+    for metric in SKETCH_METRICS:
+        values = df[metric].to_numpy(dtype=np.float64)
+        sketch = sketches.build_sketch(pd.Series(cell_ids[in_cell], name="cell"), values[in_cell])
+        parts.append(sketch.assign(metric=metric))
+    for col in CELL_KEYS[:4]:
+        cells[col] = cells[col].astype(str)
+    return AggregateCube(cells, pd.concat(parts, ignore_index=True))
+
+def load_cube(path="comprehensive_data.csv"):
+    """
+    The cube for an export, cached next to the dataset snapshot (same
+    fingerprint), so it's only rebuilt when the export changes.
+    """
+    key = f"{source_fingerprint(path)}-v{CUBE_VERSION}"
+    name = "cube_" + hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:12]
+    cube = {}
+
+    def build(part):
+        if not cube:
+            built = build_cube(load_comprehensive(path))
+            cube.update(cells=built.cells, sketches=built.sketches)
+        return cube[part]
+
+    return AggregateCube(
+        cached_frame(name + "_cells", key, lambda: build("cells")),
+        cached_frame(name + "_sketches", key, lambda: build("sketches")),
+    )
@@ -1,12 +1,26 @@
+import argparse
+import time
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-from sqlalchemy import create_engine
 from sklearn.linear_model import LinearRegression
-import config
+import db
 import os
+import telemetry
 
+from data_access import load_query
+from model_store import fit_or_load, predict
+
+def _chart_model(path):
+    """Model key stored in the chart's PNG metadata (None if there is no chart)."""
+    if not os.path.exists(path):
+        return None
+    from PIL import Image
+    with Image.open(path) as img:
+        return img.info.get("Description")
+
+@telemetry.traced("analyze")
 def analyze():
     print("==================================================")
     print("🤖 MACHINE LEARNING ANALYSIS (Price Drivers)")
@@ -15,7 +29,7 @@ def analyze():
     # 1. Connect & Load Data
     print("   Connecting to Database...")
     try:
-        engine = create_engine(config.DATABASE_URL)
+        engine = db.get_engine()
         # We use the filtered dataset (no outliers) for a robust model
         query = """
         SELECT 
@@ -27,39 +41,39 @@ def analyze():
         FROM clean_listings 
         WHERE is_outlier = FALSE AND price_clean > 0
         """
-        df = pd.read_sql(query, engine)
+        # Cached snapshot, re-queried only when clean_listings changes
+        df = load_query("ml_listings", query, tables=["clean_listings"], engine=engine)
         print(f"   Loaded {len(df)} statistically valid listings.")
     except Exception as e:
         print(f"❌ DB Connection Failed: {e}")
-        return
+        return False
 
     if df.empty:
         print("❌ No data found. Run pipeline first.")
-        return
+        return False
 
     # 2. Preprocessing
     # Selecting predictors
     features = ['room_type', 'accommodates', 'reviews', 'rating']
     target = 'price'
     
-    X = df[features]
-    y = df[target]
-    
-    # One-Hot Encoding for Categorical Variables (Room Type)
-    # drop_first=True avoids multicollinearity (dummy variable trap)
-    X_encoded = pd.get_dummies(X, drop_first=True)
-    
-    # 3. Model Training
+    # One-Hot Encoding for Categorical Variables (Room Type) happens inside the model,
+    # with drop_first=True to avoid multicollinearity (dummy variable trap)
+
+    # 3. Model Training (skipped when the training data is unchanged)
     print("   Training Linear Regression Model...")
-    model = LinearRegression()
-    model.fit(X_encoded, y)
-    r_squared = model.score(X_encoded, y)
+    model, meta = fit_or_load("price_linear", df, features, target, LinearRegression)
+    r_squared = meta['r2']
     print(f"   Model R² Score: {r_squared:.3f}")
+
+    # Batched scoring throughput check, only for a freshly fitted model
+    if meta['retrained']:
+        predict(model, df)
     
     # 4. Feature Importance Extraction
     coefs = pd.DataFrame({
-        'Feature': X_encoded.columns,
-        'Impact ($)': model.coef_
+        'Feature': model.columns,
+        'Impact ($)': model.estimator.coef_
     }).sort_values(by='Impact ($)', ascending=False)
     
     # Feature Name Cleaning
@@ -77,6 +91,12 @@ def analyze():
     print(coefs)
     
     # 5. Visualization
+    # The chart records the model it was drawn from, so it's only redrawn for a new model
+    output_path = "assets/11_feature_importance.png"
+    if not meta['retrained'] and _chart_model(output_path) == meta['key']:
+        print(f"✅ Analysis Complete. Chart is up to date: {output_path}")
+        return True
+
     print("   Generating Visualization...")
     plt.figure(figsize=(12, 6))
     sns.set_theme(style="whitegrid")
@@ -98,12 +118,163 @@ def analyze():
     
     # Save
     os.makedirs("assets", exist_ok=True)
-    output_path = "assets/11_feature_importance.png"
     plt.tight_layout()
-    plt.savefig(output_path, dpi=300)
+    plt.savefig(output_path, dpi=300, metadata={"Description": meta['key']})
     plt.close()
     
     print(f"✅ Analysis Complete. Chart saved to: {output_path}")
+    return True
+
+# --- Model Comparison Harness ----------------------------------------------
+# k-fold CV of several price models on a richer feature set: coordinates,
+# a target-encoded neighbourhood (fitted inside each fold, no leakage) and
+# per-listing calendar features. The calendar features are rates and ratios
+# only: the listing's own calendar price level would leak the target.
+# Every (model, fold) fit is an independent
+# joblib task, so the folds of all models run in parallel across cores.
+
+FEATURES_QUERY = """
+SELECT
+    cl.price_clean as price,
+    cl.room_type,
+    cl.neighbourhood,
+    cl.accommodates,
+    cl.reviews,
+    cl.rating,
+    cl.latitude,
+    cl.longitude,
+    cl.minimum_nights,
+    cal.availability_rate,
+    cal.weekend_premium
+FROM clean_listings cl
+LEFT JOIN (
+    SELECT
+        listing_id,
+        AVG(available::INT) as availability_rate,
+        (AVG(price_num) FILTER (WHERE EXTRACT(ISODOW FROM date) IN (5, 6))
+            / NULLIF(AVG(price_num), 0))::FLOAT as weekend_premium
+    FROM raw_calendar_nyc
+    GROUP BY listing_id
+) cal ON cal.listing_id = cl.id
+WHERE cl.is_outlier = FALSE AND cl.price_clean > 0
+"""
+
+CATEGORICAL_FEATURES = ['room_type']
+TARGET_ENCODED_FEATURES = ['neighbourhood']
+NUMERIC_FEATURES = ['accommodates', 'reviews', 'rating', 'latitude', 'longitude', 'minimum_nights',
+                    'availability_rate', 'weekend_premium']
+
+def _candidate_models():
+    """name -> factory of an unfitted sklearn pipeline."""
+    from sklearn.compose import ColumnTransformer
+    from sklearn.ensemble import HistGradientBoostingRegressor
+    from sklearn.impute import SimpleImputer
+    from sklearn.linear_model import Ridge
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler, TargetEncoder
+
+    def pipeline(estimator):
+        encode = ColumnTransformer([
+            ('onehot', OneHotEncoder(drop='first', handle_unknown='ignore'), CATEGORICAL_FEATURES),
+            ('target', TargetEncoder(target_type='continuous', random_state=42), TARGET_ENCODED_FEATURES),
+            ('numeric', make_pipeline(SimpleImputer(strategy='median'), StandardScaler()), NUMERIC_FEATURES),
+        ])
+        return make_pipeline(encode, estimator)
+
+    return {
+        'linear': lambda: pipeline(LinearRegression()),
+        'ridge': lambda: pipeline(Ridge(alpha=1.0)),
+        'hist_gbm': lambda: pipeline(HistGradientBoostingRegressor(random_state=42)),
+    }
+
+def _run_fold(name, factory, X, y, train_idx, test_idx):
+    """Fits one model on one fold; returns accuracy and latency numbers."""
+    from sklearn.metrics import mean_absolute_error, r2_score
+
+    model = factory()
+    start = time.perf_counter()
+    model.fit(X.iloc[train_idx], y.iloc[train_idx])
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pred = model.predict(X.iloc[test_idx])
+    predict_seconds = time.perf_counter() - start
+
+    y_test = y.iloc[test_idx]
+    return {
+        'model': name,
+        'r2': r2_score(y_test, pred),
+        'mae': mean_absolute_error(y_test, pred),
+        'rmse': float(np.sqrt(np.mean((y_test - pred) ** 2))),
+        'fit_seconds': fit_seconds,
+        'predict_ms_per_1k': predict_seconds * 1000 / len(test_idx) * 1000,
+    }
+
+@telemetry.traced("analyze.compare_models")
+def compare_models(folds=5, n_jobs=-1, budget_ms_per_1k=None):
+    """
+    k-fold CV comparison of linear, ridge and gradient-boosted models.
+    Prints and returns mean metrics per model and picks the most accurate
+    model whose predict latency fits budget_ms_per_1k (if given).
+    """
+    from joblib import Parallel, delayed
+    from sklearn.model_selection import KFold
+
+    print("==================================================")
+    print("🤖 MODEL COMPARISON (k-fold CV)")
+    print("==================================================")
+    try:
+        engine = db.get_engine()
+        df = load_query("ml_features", FEATURES_QUERY, tables=["clean_listings", "raw_calendar_nyc"], engine=engine)
+    except Exception as e:
+        print(f"❌ DB Connection Failed: {e}")
+        return None
+    if df.empty:
+        print("❌ No data found. Run pipeline first.")
+        return None
+    print(f"   Loaded {len(df)} listings with {len(CATEGORICAL_FEATURES + TARGET_ENCODED_FEATURES + NUMERIC_FEATURES)} features.")
+
+    X = df[CATEGORICAL_FEATURES + TARGET_ENCODED_FEATURES + NUMERIC_FEATURES].copy()
+    for col in CATEGORICAL_FEATURES + TARGET_ENCODED_FEATURES:
+        X[col] = X[col].astype(str)
+    y = df['price']
+
+    splits = list(KFold(n_splits=folds, shuffle=True, random_state=42).split(X))
+    tasks = [delayed(_run_fold)(name, factory, X, y, train_idx, test_idx)
+             for name, factory in _candidate_models().items()
+             for train_idx, test_idx in splits]
+    start = time.perf_counter()
+    results = pd.DataFrame(Parallel(n_jobs=n_jobs)(tasks))
+    print(f"   ⏱ {len(tasks)} fits ({folds} folds x {len(tasks) // folds} models) in {time.perf_counter() - start:.1f}s")
+
+    summary = results.groupby('model').agg(
+        r2=('r2', 'mean'),
+        r2_std=('r2', 'std'),
+        mae=('mae', 'mean'),
+        rmse=('rmse', 'mean'),
+        fit_seconds=('fit_seconds', 'mean'),
+        predict_ms_per_1k=('predict_ms_per_1k', 'mean'),
+    ).sort_values('r2', ascending=False)
+    print("\n   [Cross-Validated Comparison]")
+    print(summary.round(3).to_string())
+
+    eligible = summary if budget_ms_per_1k is None else summary[summary['predict_ms_per_1k'] <= budget_ms_per_1k]
+    if eligible.empty:
+        print(f"⚠️ No model predicts within {budget_ms_per_1k} ms per 1k listings.")
+    else:
+        print(f"\n✅ Best model for batch repricing: {eligible.index[0]} "
+              f"(R² {eligible['r2'].iloc[0]:.3f}, {eligible['predict_ms_per_1k'].iloc[0]:.1f} ms per 1k listings)")
+    summary.to_csv("model_comparison.csv")
+    return summary
 
 if __name__ == "__main__":
-    analyze()
+    parser = argparse.ArgumentParser(description="Price driver analysis and model comparison.")
+    parser.add_argument("--compare", action="store_true", help="run the cross-validated model comparison")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=-1, help="parallel fits (joblib n_jobs)")
+    parser.add_argument("--budget-ms", type=float, default=None, help="max predict latency per 1k listings")
+    args = parser.parse_args()
+    if args.compare:
+        compare_models(folds=args.folds, n_jobs=args.jobs, budget_ms_per_1k=args.budget_ms)
+    else:
+        analyze()
@@ -0,0 +1,180 @@
+"""
+data_access.py
+
+Purpose:
+One place to load the analysis datasets, shared by visualize_results.py,
+analyze_ml.py and the notebook.
+
+Every load goes through two cache levels:
+1. An in-process LRU, so repeated calls in one session return immediately.
+2. An on-disk snapshot (Feather, with categorical dtypes for the low-cardinality
+   text columns) in CACHE_DIR. A snapshot is keyed by the source file's
+   mtime/size and SHA-256, or by the source tables' versions for queries, so
+   a new export or transform run invalidates it automatically.
+"""
+
+import hashlib
+import json
+import os
+from functools import lru_cache
+
+import pandas as pd
+
+CACHE_DIR = os.getenv("DATA_CACHE_DIR", ".cache")
+CATEGORICAL_COLUMNS = ["city", "neighbourhood", "room_type", "property_type"]
+
+def _sha256(path, block_size=8 * 1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _file_stat(path):
+    """(mtime_ns, size) of a file, or of all files under a directory (Parquet dataset)."""
+    if not os.path.isdir(path):
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+    files = [os.path.join(root, name) for root, _, names in os.walk(path) for name in names]
+    stats = [os.stat(f) for f in files]
+    return max((s.st_mtime_ns for s in stats), default=0), sum(s.st_size for s in stats)
+
+def _content_hash(path):
+    if not os.path.isdir(path):
+        return _sha256(path)
+    digest = hashlib.sha256()
+    for root, _, names in sorted(os.walk(path)):
+        for name in sorted(names):
+            full = os.path.join(root, name)
+            digest.update(os.path.relpath(full, path).encode())
+            digest.update(_sha256(full).encode())
+    return digest.hexdigest()
+
+def _snapshot_paths(name):
+    base = os.path.join(CACHE_DIR, name)
+    return base + ".feather", base + ".pkl", base + ".json"
+
+def _write_json(path, data):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+def _read_meta(name):
+    meta_path = _snapshot_paths(name)[2]
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path) as f:
+        return json.load(f)
+
+def _write_snapshot(name, df, key):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    feather_path, pickle_path, meta_path = _snapshot_paths(name)
+    try:
+        df.reset_index(drop=True).to_feather(feather_path)
+        fmt = "feather"
+    except ImportError:
+        # Feather needs pyarrow; pickle keeps the categorical dtypes too
+        df.to_pickle(pickle_path)
+        fmt = "pickle"
+    _write_json(meta_path, {"key": key, "format": fmt})
+
+@lru_cache(maxsize=16)
+def _read_snapshot(name, key):
+    """LRU-cached snapshot read; `key` is part of the cache key so stale entries are never hit."""
+    feather_path, pickle_path, _ = _snapshot_paths(name)
+    if _read_meta(name).get("format") == "feather":
+        return pd.read_feather(feather_path)
+    return pd.read_pickle(pickle_path)
+
+def cached_frame(name, key, build):
+    """
+    Returns the DataFrame snapshot `name` if it was built for `key`,
+    otherwise calls build(), stores the result and returns it.
+    Always returns a fresh copy the caller may modify.
+    """
+    meta = _read_meta(name)
+    if meta is None or meta.get("key") != key:
+        _write_snapshot(name, build(), key)
+    return _read_snapshot(name, key).copy()
+
+def source_fingerprint(path):
+    """
+    SHA-256 of a source file (or Parquet dataset directory). The hash is only
+    recomputed when mtime/size change, so an untouched file costs one stat().
+    """
+    name = "source_" + hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:12]
+    meta_path = os.path.join(CACHE_DIR, name + ".json")
+    mtime, size = _file_stat(path)
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if (meta["mtime"], meta["size"]) == (mtime, size):
+            return meta["sha256"]
+    sha = _content_hash(path)
+    _write_json(meta_path, {"source": os.path.abspath(path), "mtime": mtime, "size": size, "sha256": sha})
+    return sha
+
+def _categorize(df):
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns and df[col].dtype == object:
+            df[col] = df[col].astype("category")
+    return df
+
+def _read_source(path):
+    if os.path.isdir(path) or path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+def load_comprehensive(path="comprehensive_data.csv"):
+    """
+    Loads the exported analysis dataset (CSV file or Parquet dataset directory)
+    through the cache. Returns a fresh copy the caller may modify.
+    """
+    name = "comprehensive_" + hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:12]
+    return cached_frame(name, source_fingerprint(path), lambda: _categorize(_read_source(path)))
+
+def _table_versions(engine, tables):
+    """
+    Version of each table as recorded by the pipeline: the transform step's
+    output_version for derived tables, the latest load_id for raw ones.
+    Returns None if any version is unknown.
+    """
+    from sqlalchemy import text
+
+    versions = {}
+    with engine.connect() as conn:
+        for table in tables:
+            version = None
+            if conn.execute(text("SELECT to_regclass('transform_state')")).scalar():
+                version = conn.execute(text("SELECT output_version FROM transform_state WHERE step = :t"),
+                                       {"t": table}).scalar()
+            if version is None and conn.execute(text("SELECT to_regclass('load_manifest')")).scalar():
+                version = conn.execute(text("SELECT MAX(load_id) FROM load_manifest WHERE table_name = :t"),
+                                       {"t": table}).scalar()
+            if version is None:
+                return None
+            versions[table] = version
+    return versions
+
+def load_query(name, query, tables, engine=None):
+    """
+    Runs `query` (which reads `tables`) through the cache. The snapshot is
+    reused for as long as the tables' pipeline versions are unchanged.
+    """
+    if engine is None:
+        import db
+        engine = db.get_engine()
+
+    versions = _table_versions(engine, tables)
+    if versions is None:
+        return _categorize(pd.read_sql(query, engine))
+
+    key = hashlib.sha256(json.dumps([query, versions], sort_keys=True).encode()).hexdigest()
+    return cached_frame(name, key, lambda: _categorize(pd.read_sql(query, engine)))
+
+def clear_cache():
+    """Drops the in-process LRU and every on-disk snapshot."""
+    _read_snapshot.cache_clear()
+    if os.path.isdir(CACHE_DIR):
+        for entry in os.listdir(CACHE_DIR):
+            os.remove(os.path.join(CACHE_DIR, entry))
@@ -0,0 +1,156 @@
+"""
+model_store.py
+
+Purpose:
+Persist fitted models together with their feature encoding, so analyze_ml.py
+only retrains when the training data changes and new listings can be scored
+without retraining.
+
+A model is keyed by a SHA-256 of its training data (features + target, via
+pandas' row hashing) and its spec (name, features, estimator parameters).
+fit_or_load() returns the stored model for that key or fits and stores a new
+one (joblib, in MODEL_DIR) with a JSON sidecar holding fit time, size and
+training metrics. predict() scores in batches.
+
+Usage:
+    model, meta = fit_or_load("price_linear", df, features, "price", LinearRegression)
+    prices = predict(model, new_listings)
+    python model_store.py price_linear new_listings.csv scored.csv
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+MODEL_DIR = os.getenv("MODEL_DIR", "models")
+PREDICT_BATCH_SIZE = 100000
+
+class EncodedModel:
+    """An estimator plus the one-hot encoding it was trained with."""
+
+    def __init__(self, estimator, features, categories):
+        self.estimator = estimator
+        self.features = features
+        self.categories = categories  # {column: [levels seen in training]}
+        self.columns = None
+
+    def encode(self, df):
+        """
+        One-hot encodes like pd.get_dummies(drop_first=True), but with the
+        training levels, so every batch gets the same columns in the same order.
+        """
+        X = df[self.features].copy()
+        for col, levels in self.categories.items():
+            # Levels not seen in training encode as all-zero dummies
+            values = X[col].astype(str)
+            X[col] = pd.Categorical(values.where(values.isin(levels)), categories=levels)
+        X = pd.get_dummies(X, drop_first=True)
+        if self.columns is None:
+            self.columns = list(X.columns)
+        return X.reindex(columns=self.columns, fill_value=0)
+
+def _categories(df, features):
+    return {col: sorted(df[col].dropna().astype(str).unique())
+            for col in features if not pd.api.types.is_numeric_dtype(df[col])}
+
+def data_key(name, df, features, target, params):
+    """Hash of the training rows and the model spec."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([name, features, target, params], sort_keys=True, default=str).encode())
+    digest.update(pd.util.hash_pandas_object(df[features + [target]], index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+def _paths(name, key):
+    base = os.path.join(MODEL_DIR, f"{name}-{key}")
+    return base + ".joblib", base + ".json"
+
+def _write_meta(path, meta):
+    with open(path, "w") as f:
+        json.dump(meta, f, indent=2)
+
+def fit_or_load(name, df, features, target, make_estimator, **params):
+    """
+    Returns (model, meta). Loads the stored model if one was trained on the
+    same data and spec, otherwise fits make_estimator(**params) and stores it.
+    meta['retrained'] tells which path was taken.
+    """
+    key = data_key(name, df, features, target, params)
+    model_path, meta_path = _paths(name, key)
+
+    if os.path.exists(model_path) and os.path.exists(meta_path):
+        start = time.perf_counter()
+        model = joblib.load(model_path)
+        with open(meta_path) as f:
+            meta = json.load(f)
+        meta.update(retrained=False, load_seconds=time.perf_counter() - start)
+        print(f"   ♻️ Training data unchanged; loaded model {name}-{key} "
+              f"({meta['size_bytes'] / 1024:,.0f} KB in {meta['load_seconds'] * 1000:.0f} ms)")
+        return model, meta
+
+    model = EncodedModel(make_estimator(**params), features, _categories(df, features))
+    X = model.encode(df)
+    y = df[target]
+    start = time.perf_counter()
+    model.estimator.fit(X, y)
+    fit_seconds = time.perf_counter() - start
+
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    joblib.dump(model, model_path, compress=3)
+    meta = {
+        "name": name,
+        "key": key,
+        "features": features,
+        "target": target,
+        "params": params,
+        "rows": len(df),
+        "r2": float(model.estimator.score(X, y)),
+        "fit_seconds": fit_seconds,
+        "size_bytes": os.path.getsize(model_path),
+        "trained_at": pd.Timestamp.now().isoformat(),
+    }
+    _write_meta(meta_path, meta)
+    _write_meta(os.path.join(MODEL_DIR, f"{name}-latest.json"), {"key": key})
+    meta["retrained"] = True
+    print(f"   🧠 Trained {name}-{key} on {len(df)} rows in {fit_seconds:.2f}s "
+          f"({meta['size_bytes'] / 1024:,.0f} KB on disk)")
+    return model, meta
+
+def load_latest(name):
+    """The most recently trained model of `name` (for scoring without training data)."""
+    with open(os.path.join(MODEL_DIR, f"{name}-latest.json")) as f:
+        key = json.load(f)["key"]
+    return joblib.load(_paths(name, key)[0])
+
+def predict(model, df, batch_size=PREDICT_BATCH_SIZE, report=True):
+    """Scores df in batches of batch_size rows; returns a NumPy array."""
+    start = time.perf_counter()
+    out = np.empty(len(df), dtype=np.float64)
+    for begin in range(0, len(df), batch_size):
+        batch = df.iloc[begin:begin + batch_size]
+        out[begin:begin + len(batch)] = model.estimator.predict(model.encode(batch))
+    elapsed = time.perf_counter() - start
+    if report and len(df):
+        print(f"   ⚡ Scored {len(df):,} listings in {elapsed * 1000:.0f} ms "
+              f"({len(df) / elapsed if elapsed > 0 else 0:,.0f} rows/sec)")
+    return out
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4:
+        print("Usage: python model_store.py <model name> <listings.csv> <output.csv>")
+        sys.exit(1)
+    model_name, input_path, output_path = sys.argv[1:]
+    try:
+        model = load_latest(model_name)
+    except FileNotFoundError:
+        print(f"❌ No stored model '{model_name}'. Run analyze_ml.py first.")
+        sys.exit(1)
+    listings = pd.read_csv(input_path)
+    listings["predicted_price"] = predict(model, listings)
+    listings.to_csv(output_path, index=False)
+    print(f"✅ Scored listings written to '{output_path}'.")
@@ -0,0 +1,173 @@
+"""
+risk_simulation.py
+
+Purpose:
+Monte Carlo revenue risk per neighbourhood, instead of three fixed
+occupancy multipliers.
+
+Each simulated year (path) draws, for every listing:
+- occupancy from a Beta distribution centred on the listing's estimated
+  occupancy (yield_engine), with the spread fitted to the observed occupancy
+  distribution (method of moments);
+- a listing-level price shock (lognormal, PRICE_VOLATILITY);
+and, shared by all listings of the path, a monthly market price path:
+seasonal index from seasonality_stats times lognormal shocks whose
+volatility is the spread of seasonality_stats' log prices around that index
+(deseasonalized residuals, one degree of freedom per fitted month).
+
+    revenue = occupancy * price * price_shock * sum_m(days_m * season_m * market_shock_m)
+
+Listings are simulated in chunks sized to MEMORY_BUDGET_MB (optionally in a
+process pool, with per-chunk seeds so results don't depend on the worker
+count). Chunks return mergeable sketches (sketches.py) of listing revenue and
+per-path revenue sums per neighbourhood, so memory stays bounded.
+
+Output per neighbourhood: expected revenue, listing-level percentiles
+(P5..P95) and VaR 95%: expected revenue minus the 5th percentile of the
+neighbourhood's average revenue per listing across paths.
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import sketches
+from data_access import load_query
+from yield_engine import evaluate, load_inputs, scenario_grid
+
+N_PATHS = 1000
+PRICE_VOLATILITY = 0.10    # listing-level price dispersion (assumption, no data for it)
+MEMORY_BUDGET_MB = 256
+DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31], dtype=np.float64)
+PERCENTILES = [0.05, 0.25, 0.50, 0.75, 0.95]
+
+def market_parameters(engine=None):
+    """
+    Seasonal price index per calendar month (mean 1) and the monthly price
+    volatility around it, from seasonality_stats. Flat and 0 if the table is missing.
+    """
+    try:
+        season = load_query("seasonality_stats", "SELECT month_year, avg_price FROM seasonality_stats",
+                            tables=["seasonality_stats"], engine=engine)
+    except Exception as e:
+        print(f"⚠️ seasonality_stats unavailable, using a flat season: {e}")
+        return np.ones(12), 0.0
+
+    season = season.dropna().sort_values("month_year")
+    month = pd.to_datetime(season["month_year"], format="%Y-%m").dt.month.to_numpy()
+    prices = season["avg_price"].to_numpy(dtype=np.float64)
+    if len(prices) == 0:
+        return np.ones(12), 0.0
+
+    index = np.ones(12)
+    by_month = pd.Series(prices).groupby(month).mean()
+    index[by_month.index.to_numpy() - 1] = by_month.to_numpy() / prices.mean()
+    # Shocks multiply the seasonal index, so only the deseasonalized residuals
+    # count; one degree of freedom goes to each month's mean (0 until some
+    # month has been seen more than once)
+    residuals = np.log(prices / prices.mean()) - np.log(index[month - 1])
+    dof = len(prices) - len(by_month)
+    volatility = float(np.sqrt((residuals ** 2).sum() / dof)) if dof > 0 else 0.0
+    return index, volatility
+
+def occupancy_concentration(occupancy):
+    """Beta concentration (alpha + beta) matching the observed occupancy variance."""
+    mean, var = occupancy.mean(), occupancy.var()
+    if var <= 0:
+        return 100.0
+    return max(mean * (1 - mean) / var - 1, 1.0)
+
+def market_paths(season_index, volatility, n_paths, seed):
+    """Sum over months of days x seasonal index x market shock, one value per path."""
+    rng = np.random.default_rng(seed)
+    shocks = np.exp(volatility * rng.standard_normal((n_paths, 12)) - volatility ** 2 / 2)
+    return (shocks * (DAYS_IN_MONTH * season_index)).sum(axis=1)
+
+def _simulate_chunk(price, occupancy, groups, n_groups, market, concentration, price_volatility, seed):
+    """
+    Simulates one chunk of listings (rows) over every path (columns).
+    Returns the chunk's revenue sketch per group and per-path revenue sums per group.
+    """
+    rng = np.random.default_rng(seed)
+    n_paths = len(market)
+    mean = np.clip(occupancy, 0.005, 0.995)[:, None]
+    occ = rng.beta(mean * concentration, (1 - mean) * concentration, size=(len(price), n_paths))
+    shock = np.exp(price_volatility * rng.standard_normal((len(price), n_paths)) - price_volatility ** 2 / 2)
+    revenue = occ * shock * price[:, None] * market[None, :]
+
+    sketch = sketches.sketch_codes(np.broadcast_to(groups[:, None], revenue.shape), revenue, n_groups)
+    order = np.argsort(groups, kind="stable")
+    present, starts = np.unique(groups[order], return_index=True)
+    path_sums = np.zeros((n_groups, n_paths))
+    path_sums[present] = np.add.reduceat(revenue[order], starts, axis=0)
+    return sketch, path_sums
+
+def _chunk_size(n_paths, budget_mb):
+    # ~8 arrays of chunk x paths (draws, revenue, sketch keys) are alive at once
+    return max(1, int(budget_mb * 1024 * 1024 // (n_paths * 8 * 8)))
+
+def simulate(inputs=None, n_paths=N_PATHS, by="neighbourhood", seed=42, workers=1,
+             price_volatility=PRICE_VOLATILITY, budget_mb=MEMORY_BUDGET_MB, engine=None):
+    """
+    Runs the simulation and returns one row per group (neighbourhood by default)
+    with expected revenue, revenue percentiles and VaR 95%.
+    workers > 1 spreads the chunks over a process pool.
+    """
+    if inputs is None:
+        inputs = load_inputs(engine)
+    # Estimated occupancy per listing under the config.py yield model
+    occupancy = evaluate(inputs, scenario_grid())["occupancy"][:, 0]
+    price = inputs["price"]
+    codes, names = pd.factorize(inputs[by].astype(str), sort=True)
+
+    season_index, volatility = market_parameters(engine)
+    concentration = occupancy_concentration(occupancy)
+    seeds = np.random.SeedSequence(seed)
+    market = market_paths(season_index, volatility, n_paths, seeds.spawn(1)[0])
+
+    size = _chunk_size(n_paths, budget_mb)
+    bounds = [(start, min(start + size, len(price))) for start in range(0, len(price), size)]
+    chunk_seeds = seeds.spawn(len(bounds))
+    tasks = [
+        (price[a:b], occupancy[a:b], codes[a:b], len(names), market, concentration, price_volatility, s)
+        for (a, b), s in zip(bounds, chunk_seeds)
+    ]
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_simulate_chunk, *zip(*tasks)))
+    else:
+        results = [_simulate_chunk(*task) for task in tasks]
+
+    sketch = sketches.merge(pd.concat([r[0] for r in results], ignore_index=True), by=["group"])
+    path_sums = sum(r[1] for r in results)
+    counts = np.bincount(codes, minlength=len(names))
+
+    rows = []
+    for g, name in enumerate(names):
+        per_listing = path_sums[g] / counts[g]  # average revenue per listing, per path
+        expected = per_listing.mean()
+        row = {by: name, "listings": counts[g], "expected_revenue": expected}
+        quantiles = sketches.quantile(sketch[sketch["group"] == g], PERCENTILES)
+        row.update({f"p{round(q * 100)}": v for q, v in zip(PERCENTILES, quantiles)})
+        row["var_95"] = expected - np.quantile(per_listing, 0.05)
+        rows.append(row)
+    return pd.DataFrame(rows).sort_values("expected_revenue", ascending=False).reset_index(drop=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo revenue risk per neighbourhood.")
+    parser.add_argument("--paths", type=int, default=N_PATHS)
+    parser.add_argument("--by", choices=["neighbourhood", "room_type"], default="neighbourhood")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"🎲 Simulating {args.paths} revenue paths per listing...")
+    start = time.perf_counter()
+    result = simulate(n_paths=args.paths, by=args.by, seed=args.seed, workers=args.workers)
+    print(result.round(0).to_string(index=False))
+    print(f"⏱ Done in {time.perf_counter() - start:.1f}s with {args.workers} worker(s).")
@@ -0,0 +1,95 @@
+"""
+sketches.py
+
+Purpose:
+Mergeable quantile sketches for the percentile metrics (annual_revenue,
+nightly_rate, revpar).
+
+A sketch is a histogram over logarithmic buckets: bucket b holds the values
+in (GAMMA^(b-1), GAMMA^b]. Reporting a bucket as 2 * GAMMA^b / (GAMMA + 1)
+is off by at most RELATIVE_ACCURACY, so any quantile read from a sketch is
+within 1% of a value whose rank is exact (DDSketch-style guarantee; values <= 0
+share one bucket and are reported as 0).
+
+Sketches are stored in long format, one row per (group..., bucket) with a
+count. Merging groups is a sum of counts, so percentiles for any roll-up
+(a city, a room type, several snapshots or shards) cost O(groups x buckets)
+instead of a sort over every listing.
+
+scripts/transform_data.py keeps the same buckets in SQL (price_sketch table)
+for the outlier bounds.
+"""
+
+import numpy as np
+import pandas as pd
+
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+ZERO_BUCKET = np.iinfo(np.int32).min  # values <= 0
+
+def bucketize(values):
+    """Bucket index of each value (NaNs must be filtered out by the caller)."""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, ZERO_BUCKET, dtype=np.int32)
+    positive = values > 0
+    out[positive] = np.ceil(np.log(values[positive]) / np.log(GAMMA))
+    return out
+
+def bucket_values(buckets):
+    """Representative value of each bucket."""
+    buckets = np.asarray(buckets)
+    values = 2 * np.power(GAMMA, buckets.astype(np.float64)) / (GAMMA + 1)
+    return np.where(buckets == ZERO_BUCKET, 0.0, values)
+
+def build_sketch(groups, values):
+    """
+    Sketch of `values` per group. `groups` is a DataFrame of group keys (or a
+    Series / array of group ids) aligned with `values`; rows with a NaN value
+    are ignored. Returns columns [*group columns, 'bucket', 'count'].
+    """
+    groups = pd.DataFrame(groups).reset_index(drop=True)
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    frame = groups[valid].assign(bucket=bucketize(values[valid]))
+    return frame.groupby(list(frame.columns), observed=True).size().rename("count").reset_index()
+
+def sketch_codes(codes, values, n_groups=None):
+    """
+    build_sketch for integer group codes (0..n_groups-1), e.g. a simulation's
+    listings x paths matrix: one bincount, fast for many millions of values.
+    Returns columns ['group', 'bucket', 'count'].
+    """
+    codes = np.asarray(codes, dtype=np.int64).ravel()
+    values = np.asarray(values, dtype=np.float64).ravel()
+    valid = ~np.isnan(values) & (codes >= 0)
+    codes, buckets = codes[valid], bucketize(values[valid]).astype(np.int64)
+    if len(codes) == 0:
+        return pd.DataFrame({"group": [], "bucket": [], "count": []}, dtype=np.int64)
+
+    zero = buckets == ZERO_BUCKET
+    low = buckets[~zero].min() if (~zero).any() else 0
+    slots = np.where(zero, 0, buckets - low + 1)  # slot 0 holds the zero bucket
+    width = int(slots.max()) + 1
+    n_groups = n_groups or int(codes.max()) + 1
+    counts = np.bincount(codes * width + slots, minlength=n_groups * width).reshape(n_groups, width)
+    group, slot = np.nonzero(counts)
+    bucket = np.where(slot == 0, ZERO_BUCKET, slot - 1 + low)
+    return pd.DataFrame({"group": group, "bucket": bucket.astype(np.int32), "count": counts[group, slot]})
+
+def merge(sketch, by=()):
+    """Merges a sketch down to the `by` group columns (all groups when empty)."""
+    return sketch.groupby(list(by) + ["bucket"], observed=True)["count"].sum().reset_index()
+
+def quantile(sketch, q):
+    """
+    q-quantile (scalar or list) of a sketch, treating all its rows as one
+    group. Returns NaN for an empty sketch.
+    """
+    merged = sketch.groupby("bucket")["count"].sum().sort_index()
+    if merged.empty:
+        return np.nan if np.isscalar(q) else [np.nan] * len(q)
+    cumulative = merged.to_numpy().cumsum()
+    ranks = np.asarray(q, dtype=np.float64) * (cumulative[-1] - 1)
+    idx = np.searchsorted(cumulative, ranks, side="right")
+    result = bucket_values(merged.index.to_numpy()[idx])
+    return float(result) if np.isscalar(q) else result.tolist()
@@ -0,0 +1,151 @@
+"""
+spatial_index.py
+
+Purpose:
+In-memory spatial index over listing coordinates for comp-set queries such as
+"comparable listings within 500m with the same room_type and accommodates".
+
+Coordinates are projected to local metres (equirectangular around the
+dataset's mean latitude; well under 1% error across a city) and indexed with
+scipy's cKDTree: one tree over all listings plus one per
+(room_type, accommodates) group, so filtered queries never scan other groups.
+Queries are vectorized: pass arrays of target points (or a DataFrame of
+targets) and each tree is queried once per batch.
+
+Usage:
+    index = load_index("comprehensive_data.csv")
+    index.within(40.72, -73.99, radius_m=500, room_type="Entire home/apt", accommodates=4)
+    index.nearest(lats, lons, k=10)
+    index.comp_sets(targets_df, radius_m=500)
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from data_access import load_comprehensive
+
+EARTH_RADIUS_M = 6371000.0
+GROUP_KEYS = ["room_type", "accommodates"]
+
+class CompSetIndex:
+    """KD-trees over the listings of `df` (needs latitude/longitude plus GROUP_KEYS)."""
+
+    def __init__(self, df):
+        df = df.dropna(subset=["latitude", "longitude"]).reset_index(drop=True)
+        self.listings = df
+        self._lat0 = np.radians(df["latitude"].mean())
+        self._lon0 = np.radians(df["longitude"].mean())
+        points = self._project(df["latitude"].to_numpy(), df["longitude"].to_numpy())
+        self._tree = cKDTree(points)
+
+        # Per-group trees; rows maps tree positions back to listing rows
+        self._groups = {
+            key: (cKDTree(points[rows]), rows)
+            for key, rows in df.groupby(GROUP_KEYS, observed=True).indices.items()
+        }
+
+    def _project(self, lat, lon):
+        lat = np.radians(np.atleast_1d(np.asarray(lat, dtype=np.float64)))
+        lon = np.radians(np.atleast_1d(np.asarray(lon, dtype=np.float64)))
+        x = EARTH_RADIUS_M * (lon - self._lon0) * np.cos(self._lat0)
+        y = EARTH_RADIUS_M * (lat - self._lat0)
+        return np.column_stack([x, y])
+
+    def _tree_for(self, room_type=None, accommodates=None):
+        if room_type is None and accommodates is None:
+            return self._tree, None
+        if room_type is None or accommodates is None:
+            raise ValueError("filter on both room_type and accommodates, or neither")
+        return self._groups.get((room_type, accommodates), (None, None))
+
+    def _query(self, points, tree, rows, radius_m=None, k=None):
+        """Flat (target, listing row, distance) arrays for a batch of projected points."""
+        if tree is None:
+            empty = np.array([], dtype=np.int64)
+            return empty, empty, np.array([], dtype=np.float64)
+        if k is None:
+            matches = tree.query_ball_point(points, r=radius_m, return_sorted=True)
+            lengths = np.fromiter((len(m) for m in matches), dtype=np.int64, count=len(points))
+            positions = np.fromiter((p for m in matches for p in m), dtype=np.int64, count=lengths.sum())
+            target = np.repeat(np.arange(len(points)), lengths)
+            distance = np.hypot(*(tree.data[positions] - points[target]).T)
+        else:
+            distance, positions = tree.query(points, k=min(k, tree.n))
+            distance = np.asarray(distance).reshape(len(points), -1).ravel()
+            positions = np.asarray(positions).reshape(len(points), -1).ravel()
+            target = np.repeat(np.arange(len(points)), len(positions) // max(len(points), 1))
+        return target, (positions if rows is None else rows[positions]), distance
+
+    def _result(self, target, listing_rows, distance):
+        out = self.listings.iloc[listing_rows].reset_index(drop=True)
+        out.insert(0, "target_idx", target)
+        out["distance_m"] = distance
+        return out
+
+    def within(self, lat, lon, radius_m=500, room_type=None, accommodates=None):
+        """
+        Listings within radius_m of each target point (scalars or arrays),
+        nearest first. Returns one DataFrame with target_idx and distance_m.
+        """
+        points = self._project(lat, lon)
+        tree, rows = self._tree_for(room_type, accommodates)
+        return self._result(*self._query(points, tree, rows, radius_m=radius_m))
+
+    def nearest(self, lat, lon, k=10, room_type=None, accommodates=None):
+        """The k nearest listings to each target point, as within()."""
+        points = self._project(lat, lon)
+        tree, rows = self._tree_for(room_type, accommodates)
+        return self._result(*self._query(points, tree, rows, k=k))
+
+    def comp_sets(self, targets, radius_m=500, k=None):
+        """
+        Batch comp sets for a DataFrame of targets (latitude, longitude,
+        room_type, accommodates; optional id, excluded from its own comp set).
+        Uses a radius query, or the k nearest when k is given.
+        Returns one long DataFrame: target_idx (targets' index), id, distance_m.
+        """
+        targets_idx, found_rows, distances = [], [], []
+        for key, group in targets.groupby(GROUP_KEYS, observed=True):
+            tree, rows = self._groups.get(key, (None, None))
+            points = self._project(group["latitude"], group["longitude"])
+            target, listing_rows, distance = self._query(
+                points, tree, rows, radius_m=radius_m, k=None if k is None else k + 1
+            )
+            if "id" in group.columns:
+                keep = self.listings["id"].to_numpy()[listing_rows] != group["id"].to_numpy()[target]
+                target, listing_rows, distance = target[keep], listing_rows[keep], distance[keep]
+            targets_idx.append(group.index.to_numpy()[target])
+            found_rows.append(listing_rows)
+            distances.append(distance)
+
+        if not targets_idx:
+            return pd.DataFrame(columns=["target_idx", "id", "distance_m"])
+        out = pd.DataFrame({
+            "target_idx": np.concatenate(targets_idx),
+            "id": self.listings["id"].to_numpy()[np.concatenate(found_rows)],
+            "distance_m": np.concatenate(distances),
+        })
+        if k is not None:
+            out = out[out.groupby("target_idx").cumcount() < k]
+        return out.reset_index(drop=True)
+
+def load_index(path="comprehensive_data.csv"):
+    """Builds the index from the (cached) export."""
+    start = time.perf_counter()
+    index = CompSetIndex(load_comprehensive(path))
+    print(f"🗺 Indexed {len(index.listings)} listings in {len(index._groups)} comp groups "
+          f"({(time.perf_counter() - start) * 1000:.0f} ms)")
+    return index
+
+if __name__ == "__main__":
+    index = load_index()
+    sample = index.listings.sample(min(1000, len(index.listings)), random_state=0)
+    start = time.perf_counter()
+    comps = index.comp_sets(sample, radius_m=500)
+    elapsed = time.perf_counter() - start
+    print(f"✅ Comp sets (500m, same room_type/accommodates) for {len(sample)} listings "
+          f"in {elapsed * 1000:.0f} ms: {len(comps)} comparables, "
+          f"median {comps.groupby('target_idx').size().median() if len(comps) else 0:.0f} per listing")
@@ -2,268 +2,365 @@ import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 import traceback
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
 
-def generate_visuals():
-    print("🎨 Step 1: Loading Data...")
-    df = pd.read_csv("comprehensive_data.csv")
-    print("   Data Loaded. Shape:", df.shape)
+import telemetry
+from data_access import load_comprehensive
+from aggregate_cube import load_cube
 
-    # Global Theme
-    sns.set_theme(style="white", context="talk") # Clean white background
-    
-    # 🥇 1. Neighborhood Strategy (Scatter: Volume vs Efficiency)
-    try:
-        # Aggregation
-        nbhd_stats = df.groupby('neighbourhood').agg({
-            'annual_revenue': 'sum',
-            'id': 'count'
-        }).reset_index()
-        nbhd_stats['revenue_per_listing'] = nbhd_stats['annual_revenue'] / nbhd_stats['id']
-        
-        # Filter sparse neighborhoods
-        nbhd_stats = nbhd_stats[nbhd_stats['id'] > 50] # Reasonable sample size
-        
-        plt.figure(figsize=(10, 8))
-        
-        # Plot
-        p = sns.scatterplot(
-            data=nbhd_stats, 
-            x='annual_revenue', 
-            y='revenue_per_listing', 
-            size='id', 
-            sizes=(50, 500), 
-            alpha=0.7, 
-            hue='revenue_per_listing', 
-            palette='viridis',
-            legend=False
-        )
-        
-        # Annotate Top Performers
-        top_efficiency = nbhd_stats.sort_values('revenue_per_listing', ascending=False).head(5)
-        top_volume = nbhd_stats.sort_values('annual_revenue', ascending=False).head(5)
-        to_annotate = pd.concat([top_efficiency, top_volume]).drop_duplicates()
-        
-        for line in range(0, to_annotate.shape[0]):
-             p.text(
-                 to_annotate.annual_revenue.iloc[line], 
-                 to_annotate.revenue_per_listing.iloc[line]+1000, 
-                 to_annotate.neighbourhood.iloc[line], 
-                 horizontalalignment='center', 
-                 size='small', 
-                 color='black', 
-                 weight='semibold'
-             )
-
-        plt.title("1. Market Matrix: Identifying 'Cash Cows'", fontweight='bold')
-        plt.xlabel("Total Market Revenue (Volume)", fontweight='bold')
-        plt.ylabel("Avg Revenue Per Listing (Efficiency)", fontweight='bold')
-        
-        # Add Quadrant Text
-        plt.axhline(nbhd_stats['revenue_per_listing'].median(), color='gray', linestyle='--', alpha=0.3)
-        plt.axvline(nbhd_stats['annual_revenue'].median(), color='gray', linestyle='--', alpha=0.3)
-        
-        plt.text(nbhd_stats['annual_revenue'].max(), nbhd_stats['revenue_per_listing'].max(), "High Eff / High Vol\n(Cash Cows)", ha='right', va='top', color='green', fontweight='bold')
-        plt.text(0, 0, "Low Eff / Low Vol\n(Avoid)", ha='left', va='bottom', color='red', padding=10)
-        
-        # Format Axis
-        current_values = plt.gca().get_xticks()
-        plt.gca().set_xticklabels(['${:,.0f}M'.format(x/1000000) for x in current_values])
-        
-        plt.grid(True, linestyle=':', alpha=0.5)
-        plt.tight_layout()
-        plt.savefig("assets/1_top_revenue_hoods.png")
-        plt.close()
-        print("   Chart 1 OK.")
-    except Exception:
-        print("   Chart 1 Failed.")
-        traceback.print_exc()
+# Each chart is a pair of functions:
+#   prepare(df, cube) -> payload : cheap aggregation in the parent process
+#                                  (from the aggregate cube where possible)
+#   render(payload)        : CPU-bound matplotlib work, run in a worker process
+# Payloads are small; large NumPy arrays inside them are handed to the
+# workers through memory-mapped .npy files instead of being pickled per task.
 
-    # 🥈 2. Room Efficiency (Clean Bar Chart)
-    try:
-        plt.figure(figsize=(10, 6))
-        
-        # Filter
-        clean_df = df[df['room_type'] != 'Hotel room']
-        
-        # Aggregation with N count
-        efficiency = clean_df.groupby('room_type').agg({
-            'revpar': 'mean',
-            'id': 'count'
-        }).reset_index()
-        
-        # Plot
-        ax = sns.barplot(data=efficiency, x='room_type', y='revpar', palette="Blues_d")
-        
-        # Annotate
-        for i, row in efficiency.iterrows():
-            ax.text(i, row['revpar'] + 2, f"${row['revpar']:.0f}\n(n={row['id']})", 
-                    ha='center', va='bottom', fontweight='bold', fontsize=12)
-            
-        plt.title("2. Asset Efficiency: RevPAR Comparison", fontweight='bold')
-        
-        # Remove Y-Axis (Data-Ink Ratio)
-        plt.ylabel("")
-        plt.yticks([]) 
-        plt.xlabel("")
-        sns.despine(left=True) # Remove left spine
-        
-        plt.figtext(0.5, 0.05, "Insight: Entire Homes generate highest yield per unit.", ha="center", style='italic')
-        plt.tight_layout(rect=[0, 0.05, 1, 1])
-        plt.savefig("assets/2_room_efficiency.png")
-        plt.close()
-        print("   Chart 2 OK.")
-    except Exception:
-        print("   Chart 2 Failed.")
-        traceback.print_exc()
+# 🥇 1. Neighborhood Strategy (Scatter: Volume vs Efficiency)
+def prepare_chart1(df, cube):
+    # Aggregation (roll the cube up to neighbourhoods)
+    nbhd_stats = cube.rollup('neighbourhood').rename(
+        columns={'revenue_sum': 'annual_revenue', 'listings': 'id', 'revenue_mean': 'revenue_per_listing'}
+    )[['neighbourhood', 'annual_revenue', 'id', 'revenue_per_listing']]
 
-    # 🥉 3. Price vs Occupancy (Low Alpha)
-    try:
-        plt.figure(figsize=(10, 8))
-        
-        # Filter outliers for clean Viz
-        viz_df = df[(df['nightly_rate'] < 500) & (df['occupancy_rate'] > 0)].copy()
-        p90_revpar = viz_df['revpar'].quantile(0.90)
-        viz_df['is_top_performer'] = viz_df['revpar'] > p90_revpar
-        
-        # Plot (Fade non-performers to create heat map effect)
-        sns.scatterplot(
-            data=viz_df[~viz_df['is_top_performer']], 
-            x='nightly_rate', 
-            y='occupancy_rate', 
-            color='#95a5a6', 
-            alpha=0.1, # Critical fix
-            s=40, 
-            label='Standard Listings'
-        )
-        
-        sns.scatterplot(
-            data=viz_df[viz_df['is_top_performer']], 
-            x='nightly_rate', 
-            y='occupancy_rate', 
-            color='#2ecc71', 
-            alpha=0.8, 
-            s=60, 
-            label='Top 10% Yield'
-        )
-        
-        # Annotate Optimal Zone
-        opt_price = viz_df[viz_df['is_top_performer']]['nightly_rate'].median()
-        plt.axvline(opt_price, color='#27ae60', linestyle='--', alpha=0.5)
-        
-        props = dict(boxstyle='round', facecolor='white', alpha=0.9, edgecolor='#2ecc71')
-        plt.text(opt_price + 20, 0.9, f"Optimal Band:\n~${opt_price-30:.0f} - ${opt_price+30:.0f}", 
-                 bbox=props, fontsize=11, color='#27ae60', fontweight='bold')
-
-        plt.title("3. Pricing Strategy: Efficiency Frontier", fontweight='bold')
-        plt.xlabel("Nightly Price ($)")
-        plt.ylabel("Est. Occupancy Rate")
-        sns.despine()
-        
-        plt.legend(loc='upper right', frameon=True)
-        plt.tight_layout()
-        plt.savefig("assets/3_price_vs_occupancy.png")
-        plt.close()
-        print("   Chart 3 OK.")
-    except Exception:
-        print("   Chart 3 Failed.")
-        traceback.print_exc()
+    # Filter sparse neighborhoods
+    nbhd_stats = nbhd_stats[nbhd_stats['id'] > 50] # Reasonable sample size
+    return {'nbhd_stats': nbhd_stats}
+
+def render_chart1(payload):
+    nbhd_stats = payload['nbhd_stats']
+
+    plt.figure(figsize=(10, 8))
+
+    # Plot
+    p = sns.scatterplot(
+        data=nbhd_stats,
+        x='annual_revenue',
+        y='revenue_per_listing',
+        size='id',
+        sizes=(50, 500),
+        alpha=0.7,
+        hue='revenue_per_listing',
+        palette='viridis',
+        legend=False
+    )
+
+    # Annotate Top Performers
+    top_efficiency = nbhd_stats.sort_values('revenue_per_listing', ascending=False).head(5)
+    top_volume = nbhd_stats.sort_values('annual_revenue', ascending=False).head(5)
+    to_annotate = pd.concat([top_efficiency, top_volume]).drop_duplicates()
+
+    for line in range(0, to_annotate.shape[0]):
+         p.text(
+             to_annotate.annual_revenue.iloc[line],
+             to_annotate.revenue_per_listing.iloc[line]+1000,
+             to_annotate.neighbourhood.iloc[line],
+             horizontalalignment='center',
+             size='small',
+             color='black',
+             weight='semibold'
+         )
+
+    plt.title("1. Market Matrix: Identifying 'Cash Cows'", fontweight='bold')
+    plt.xlabel("Total Market Revenue (Volume)", fontweight='bold')
+    plt.ylabel("Avg Revenue Per Listing (Efficiency)", fontweight='bold')
+
+    # Add Quadrant Text
+    plt.axhline(nbhd_stats['revenue_per_listing'].median(), color='gray', linestyle='--', alpha=0.3)
+    plt.axvline(nbhd_stats['annual_revenue'].median(), color='gray', linestyle='--', alpha=0.3)
+
+    plt.text(nbhd_stats['annual_revenue'].max(), nbhd_stats['revenue_per_listing'].max(), "High Eff / High Vol\n(Cash Cows)", ha='right', va='top', color='green', fontweight='bold')
+    plt.text(0, 0, "Low Eff / Low Vol\n(Avoid)", ha='left', va='bottom', color='red', bbox=dict(facecolor='none', edgecolor='none', pad=10))
+
+    # Format Axis
+    current_values = plt.gca().get_xticks()
+    plt.gca().set_xticklabels(['${:,.0f}M'.format(x/1000000) for x in current_values])
+
+    plt.grid(True, linestyle=':', alpha=0.5)
+    plt.tight_layout()
+    plt.savefig("assets/1_top_revenue_hoods.png")
+    plt.close()
+
+# 🥈 2. Room Efficiency (Clean Bar Chart)
+def prepare_chart2(df, cube):
+    # Filter
+    mask = ~cube.select(room_type='Hotel room')
+
+    # Aggregation with N count
+    efficiency = cube.rollup('room_type', mask=mask).rename(
+        columns={'revpar_mean': 'revpar', 'listings': 'id'}
+    )[['room_type', 'revpar', 'id']]
+    return {'efficiency': efficiency}
+
+def render_chart2(payload):
+    efficiency = payload['efficiency']
+
+    plt.figure(figsize=(10, 6))
+
+    # Plot
+    ax = sns.barplot(data=efficiency, x='room_type', y='revpar', palette="Blues_d")
+
+    # Annotate
+    for i, row in efficiency.iterrows():
+        ax.text(i, row['revpar'] + 2, f"${row['revpar']:.0f}\n(n={row['id']})",
+                ha='center', va='bottom', fontweight='bold', fontsize=12)
+
+    plt.title("2. Asset Efficiency: RevPAR Comparison", fontweight='bold')
+
+    # Remove Y-Axis (Data-Ink Ratio)
+    plt.ylabel("")
+    plt.yticks([])
+    plt.xlabel("")
+    sns.despine(left=True) # Remove left spine
+
+    plt.figtext(0.5, 0.05, "Insight: Entire Homes generate highest yield per unit.", ha="center", style='italic')
+    plt.tight_layout(rect=[0, 0.05, 1, 1])
+    plt.savefig("assets/2_room_efficiency.png")
+    plt.close()
+
+# 🥉 3. Price vs Occupancy (Low Alpha)
+def prepare_chart3(df, cube):
+    # Plots individual listings, so this one still needs the rows
+    # Filter outliers for clean Viz
+    viz_df = df[(df['nightly_rate'] < 500) & (df['occupancy_rate'] > 0)]
+    # Same filter on the cube's cells (price bands end at $500)
+    viz_cells = (cube.cells['band_max'] <= 500).to_numpy() & cube.select(has_occupancy=True)
+    p90_revpar = cube.quantile('revpar', 0.90, mask=viz_cells)
+    is_top = (viz_df['revpar'] > p90_revpar).to_numpy()
+    return {
+        'nightly_rate': viz_df['nightly_rate'].to_numpy(dtype=np.float64),
+        'occupancy_rate': viz_df['occupancy_rate'].to_numpy(dtype=np.float64),
+        'is_top_performer': is_top,
+    }
+
+def render_chart3(payload):
+    price = np.asarray(payload['nightly_rate'])
+    occupancy = np.asarray(payload['occupancy_rate'])
+    is_top = np.asarray(payload['is_top_performer'])
+
+    plt.figure(figsize=(10, 8))
 
-    # 🏅 4. Illustrative Revenue Scenarios
+    # Plot (Fade non-performers to create heat map effect)
+    sns.scatterplot(
+        x=price[~is_top],
+        y=occupancy[~is_top],
+        color='#95a5a6',
+        alpha=0.1, # Critical fix
+        s=40,
+        label='Standard Listings'
+    )
+
+    sns.scatterplot(
+        x=price[is_top],
+        y=occupancy[is_top],
+        color='#2ecc71',
+        alpha=0.8,
+        s=60,
+        label='Top 10% Yield'
+    )
+
+    # Annotate Optimal Zone
+    opt_price = np.median(price[is_top])
+    plt.axvline(opt_price, color='#27ae60', linestyle='--', alpha=0.5)
+
+    props = dict(boxstyle='round', facecolor='white', alpha=0.9, edgecolor='#2ecc71')
+    plt.text(opt_price + 20, 0.9, f"Optimal Band:\n~${opt_price-30:.0f} - ${opt_price+30:.0f}",
+             bbox=props, fontsize=11, color='#27ae60', fontweight='bold')
+
+    plt.title("3. Pricing Strategy: Efficiency Frontier", fontweight='bold')
+    plt.xlabel("Nightly Price ($)")
+    plt.ylabel("Est. Occupancy Rate")
+    sns.despine()
+
+    plt.legend(loc='upper right', frameon=True)
+    plt.tight_layout()
+    plt.savefig("assets/3_price_vs_occupancy.png")
+    plt.close()
+
+# 🏅 4. Illustrative Revenue Scenarios
+def prepare_chart4(df, cube):
+    # Percentiles from the cube's sketches (within 1% of the exact values)
+    p25, p50, p75 = cube.quantile('annual_revenue', [0.25, 0.5, 0.75])
+    return {'p25': p25, 'p50': p50, 'p75': p75}
+
+def render_chart4(payload):
+    plt.figure(figsize=(10, 6))
+
+    scenarios = pd.DataFrame({
+        'Scenario': ['Conservative (P25)', 'Base (Median)', 'Aggressive (P75)'],
+        'Revenue': [payload['p25'], payload['p50'], payload['p75']]
+    })
+
+    colors = ["#7f8c8d", "#2980b9", "#27ae60"]
+
+    ax = sns.barplot(data=scenarios, x='Scenario', y='Revenue', palette=colors)
+
+    for i, v in enumerate(scenarios['Revenue']):
+        ax.text(i, v + 500, f"${v:,.0f}", ha='center', va='bottom', fontweight='bold', fontsize=14)
+
+    plt.title("4. Investment Benchmarks: Illustrative Revenue Scenarios", fontweight='bold')
+    plt.ylabel("")
+    plt.yticks([])
+    plt.xlabel("")
+    sns.despine(left=True)
+
+    plt.figtext(0.5, 0.02, "Note: Based on actual historical performance percentiles (P25/P50/P75) of the NYC dataset.",
+                ha="center", fontsize=10, style='italic', color='gray')
+
+    plt.tight_layout(rect=[0, 0.05, 1, 1])
+    plt.savefig("assets/4_revenue_scenarios.png")
+    plt.close()
+
+# 🏅 6. Pricing Strategy Table (Clean Design)
+def prepare_chart6(df, cube):
+    p25, p50, p75, p90 = cube.quantile('nightly_rate', [0.25, 0.5, 0.75, 0.90])
+    return {'p25': p25, 'p50': p50, 'p75': p75, 'p90': p90}
+
+def render_chart6(payload):
+    table_data = [
+        ["Budget Strategy (P25)", f"${payload['p25']:.0f}"],
+        ["Market Median",      f"${payload['p50']:.0f}"],
+        ["Premium Tier (P75)",  f"${payload['p75']:.0f}"],
+        ["Luxury Tier (P90)",   f"${payload['p90']:.0f}"]
+    ]
+
+    fig, ax = plt.subplots(figsize=(8, 3)) # Wider
+    ax.axis('tight')
+    ax.axis('off')
+
+    the_table = ax.table(
+        cellText=table_data,
+        colLabels=["Pricing Tier", "Target Price"],
+        loc='center',
+        cellLoc='left' # Align text left
+    )
+
+    # Polish Table Styling
+    the_table.auto_set_font_size(False)
+    the_table.set_fontsize(13)
+    the_table.scale(1, 2)
+
+    # Remove cell borders
+    for key, cell in the_table.get_celld().items():
+        cell.set_linewidth(0) # No border
+        if key[0] == 0: # Header
+            cell.set_text_props(weight='bold')
+            cell.set_linewidth(0)
+            cell.set_facecolor('#ecf0f1') # Light gray header
+        else:
+             cell.set_facecolor('white')
+             # Add thin bottom border
+             if key[1] == 0 or key[1] == 1:
+                 cell.set_edgecolor('#bdc3c7')
+                 cell.set_linewidth(0.5)
+                 cell.set_linestyle('-')
+                 cell.set_height(0.15)
+
+    # Numbers right aligned
+    for row in range(1, 5):
+        the_table[(row, 1)].set_text_props(ha='right')
+
+    plt.title("6. Pricing Strategy Guide", y=1.1, fontweight='bold')
+
+    plt.savefig("assets/6_pricing_table.png", bbox_inches='tight', dpi=300)
+    plt.close()
+
+# Chart registry: number -> (prepare, render)
+CHARTS = {
+    1: (prepare_chart1, render_chart1),
+    2: (prepare_chart2, render_chart2),
+    3: (prepare_chart3, render_chart3),
+    4: (prepare_chart4, render_chart4),
+    6: (prepare_chart6, render_chart6),
+}
+
+def _share_arrays(payload, shm_dir, prefix):
+    """Swaps NumPy arrays in a payload for paths of .npy files the workers memory-map."""
+    shared = {}
+    for key, value in payload.items():
+        if isinstance(value, np.ndarray):
+            path = os.path.join(shm_dir, f"{prefix}_{key}.npy")
+            np.save(path, value)
+            shared[key] = ('__npy__', path)
+        else:
+            shared[key] = value
+    return shared
+
+def _attach_arrays(payload):
+    return {key: np.load(value[1], mmap_mode='r') if isinstance(value, tuple) and value[:1] == ('__npy__',) else value
+            for key, value in payload.items()}
+
+def _init_worker():
+    plt.switch_backend("Agg")
+    # Global Theme
+    sns.set_theme(style="white", context="talk") # Clean white background
+
+def _render_chart(number, payload):
+    """Worker task: renders one chart. Returns (number, ok, seconds)."""
+    start = time.perf_counter()
     try:
-        plt.figure(figsize=(10, 6))
-        
-        p25 = df['annual_revenue'].quantile(0.25)
-        p50 = df['annual_revenue'].median()
-        p75 = df['annual_revenue'].quantile(0.75)
-        
-        scenarios = pd.DataFrame({
-            'Scenario': ['Conservative (P25)', 'Base (Median)', 'Aggressive (P75)'],
-            'Revenue': [p25, p50, p75]
-        })
-        
-        colors = ["#7f8c8d", "#2980b9", "#27ae60"]
-        
-        ax = sns.barplot(data=scenarios, x='Scenario', y='Revenue', palette=colors)
-        
-        for i, v in enumerate(scenarios['Revenue']):
-            ax.text(i, v + 500, f"${v:,.0f}", ha='center', va='bottom', fontweight='bold', fontsize=14)
-
-        plt.title("4. Investment Benchmarks: Illustrative Revenue Scenarios", fontweight='bold')
-        plt.ylabel("")
-        plt.yticks([])
-        plt.xlabel("")
-        sns.despine(left=True)
-        
-        plt.figtext(0.5, 0.02, "Note: Based on actual historical performance percentiles (P25/P50/P75) of the NYC dataset.", 
-                    ha="center", fontsize=10, style='italic', color='gray')
-        
-        plt.tight_layout(rect=[0, 0.05, 1, 1])
-        plt.savefig("assets/4_revenue_scenarios.png")
-        plt.close()
-        print("   Chart 4 OK.")
+        with telemetry.stage(f"visuals.render.chart{number}"):
+            CHARTS[number][1](_attach_arrays(payload))
+        return number, True, time.perf_counter() - start
     except Exception:
-        print("   Chart 4 Failed.")
+        print(f"   Chart {number} Failed.")
         traceback.print_exc()
+        plt.close('all')
+        return number, False, time.perf_counter() - start
 
+@telemetry.traced("visuals")
+def generate_visuals(workers=None):
+    """
+    Renders every chart in CHARTS. Aggregates are prepared once in this
+    process, and the matplotlib work runs concurrently in a process pool
+    (workers=1 renders inline).
+    """
+    print("🎨 Step 1: Loading Data...")
+    df = load_comprehensive("comprehensive_data.csv")
+    cube = load_cube("comprehensive_data.csv")
+    print("   Data Loaded. Shape:", df.shape, "| Cube cells:", len(cube.cells))
+    os.makedirs("assets", exist_ok=True)
 
+    # Aggregation happens once, in the parent
+    payloads, prepare_times = {}, {}
+    for number, (prepare, _) in CHARTS.items():
+        start = time.perf_counter()
+        try:
+            with telemetry.stage(f"visuals.prepare.chart{number}"):
+                payloads[number] = prepare(df, cube)
+        except Exception:
+            print(f"   Chart {number} Failed.")
+            traceback.print_exc()
+        prepare_times[number] = time.perf_counter() - start
 
-    # 🏅 6. Pricing Strategy Table (Clean Design)
+    workers = workers or min(len(payloads), os.cpu_count() or 1)
+    shm_dir = tempfile.mkdtemp(prefix="charts_")
+    start = time.perf_counter()
     try:
-        stats = df['nightly_rate'].describe(percentiles=[0.25, 0.5, 0.75, 0.90])
-        
-        table_data = [
-            ["Budget Strategy (P25)", f"${stats['25%']:.0f}"],
-            ["Market Median",      f"${stats['50%']:.0f}"],
-            ["Premium Tier (P75)",  f"${stats['75%']:.0f}"],
-            ["Luxury Tier (P90)",   f"${stats['90%']:.0f}"]
-        ]
-        
-        fig, ax = plt.subplots(figsize=(8, 3)) # Wider
-        ax.axis('tight')
-        ax.axis('off')
-        
-        the_table = ax.table(
-            cellText=table_data, 
-            colLabels=["Pricing Tier", "Target Price"], 
-            loc='center', 
-            cellLoc='left' # Align text left
-        )
-        
-        # Polish Table Styling
-        the_table.auto_set_font_size(False)
-        the_table.set_fontsize(13)
-        the_table.scale(1, 2)
-        
-        # Remove cell borders
-        for key, cell in the_table.get_celld().items():
-            cell.set_linewidth(0) # No border
-            if key[0] == 0: # Header
-                cell.set_text_props(weight='bold')
-                cell.set_linewidth(0)
-                cell.set_facecolor('#ecf0f1') # Light gray header
-            else:
-                 cell.set_facecolor('white')
-                 # Add thin bottom border
-                 if key[1] == 0 or key[1] == 1:
-                     cell.set_edgecolor('#bdc3c7')
-                     cell.set_linewidth(0.5)
-                     cell.set_linestyle('-')
-                     cell.set_height(0.15)
-        
-        # Numbers right aligned
-        for row in range(1, 5):
-            the_table[(row, 1)].set_text_props(ha='right')
-        
-        plt.title("6. Pricing Strategy Guide", y=1.1, fontweight='bold')
-        
-        plt.savefig("assets/6_pricing_table.png", bbox_inches='tight', dpi=300)
-        plt.close()
-        print("   Chart 6 OK.")
-    except Exception:
-        print("   Chart 6 Failed.")
-        traceback.print_exc()
+        if workers <= 1:
+            _init_worker()
+            results = [_render_chart(n, p) for n, p in payloads.items()]
+        else:
+            shared = {n: _share_arrays(p, shm_dir, f"chart{n}") for n, p in payloads.items()}
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                results = list(pool.map(_render_chart, shared.keys(), shared.values()))
+    finally:
+        shutil.rmtree(shm_dir, ignore_errors=True)
+
+    for number, ok, render_time in results:
+        if ok:
+            print(f"   Chart {number} OK. (prepare {prepare_times[number]:.2f}s, render {render_time:.2f}s)")
+    rendered = sum(ok for _, ok, _ in results)
+    print(f"   ⏱ Rendered {rendered} of {len(CHARTS)} charts in {time.perf_counter() - start:.2f}s with {workers} worker(s).")
+    # Charts whose prepare failed never reached the render step
+    failed = sorted(set(CHARTS) - {number for number, ok, _ in results if ok})
+    if failed:
+        print(f"❌ Failed charts: {', '.join(map(str, failed))}")
 
 if __name__ == "__main__":
     generate_visuals()
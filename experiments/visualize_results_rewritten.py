@@ -11,15 +11,17 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from data_access import load_comprehensive
+
 sns.set_theme(style="whitegrid", context="talk")
 
 def load_data(path="comprehensive_data.csv"):
-    """Load cleaned analytical dataset."""
-    return pd.read_csv(path)
+    """Load cleaned analytical dataset (cached, see data_access.py)."""
+    return load_comprehensive(path)
 
 def plot_revpar_by_room(df):
     room_rev = (
-        df.groupby("room_type")
+        df.groupby("room_type", observed=True)
           .agg(avg_revpar=("revpar", "mean"), listings=("id", "count"))
           .reset_index()
     )
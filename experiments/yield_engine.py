@@ -0,0 +1,132 @@
+"""
+yield_engine.py
+
+Purpose:
+The yield model of yield_analysis (scripts/transform_data.py), vectorized in
+NumPy so what-if scenarios don't need a table rebuild in Postgres.
+
+    occupancy = MIN((reviews_per_month / review_rate) * minimum_nights / 30, occupancy_cap)
+    revpar    = price * occupancy
+    revenue   = price * 365 * scenario_factor
+
+A scenario grid is the cartesian product of review rates, occupancy caps and
+revenue factors. evaluate() computes every scenario for every listing in one
+broadcast pass and returns listings x scenarios matrices. With the defaults
+from config.py the single scenario reproduces yield_analysis.
+
+Usage:
+    inputs = load_inputs()
+    grid = scenario_grid(review_rates=[0.3, 0.5, 0.7], occupancy_caps=[0.6, 0.7, 0.8])
+    result = evaluate(inputs, grid)
+    summarize(result)
+"""
+
+import itertools
+import time
+
+import numpy as np
+import pandas as pd
+
+import config
+from data_access import load_query
+
+INPUT_QUERY = """
+SELECT
+    id,
+    neighbourhood,
+    room_type,
+    price_clean,
+    reviews_per_month,
+    minimum_nights
+FROM clean_listings
+WHERE price_clean > 0 AND is_outlier = FALSE
+ORDER BY id
+"""
+
+def load_inputs(engine=None):
+    """Listing arrays for the engine (cached snapshot of the yield_analysis population)."""
+    df = load_query("yield_inputs", INPUT_QUERY, tables=["clean_listings"], engine=engine)
+    return {
+        "id": df["id"].to_numpy(),
+        "neighbourhood": df["neighbourhood"],
+        "room_type": df["room_type"],
+        "price": df["price_clean"].to_numpy(dtype=np.float64),
+        "reviews_per_month": df["reviews_per_month"].to_numpy(dtype=np.float64),
+        "minimum_nights": df["minimum_nights"].to_numpy(dtype=np.float64),
+    }
+
+def scenario_grid(review_rates=None, occupancy_caps=None, factors=None):
+    """
+    One row per scenario: review_rate x occupancy_cap x revenue factor.
+    Omitted axes default to the values in config.py; `factors` may be a
+    list or a {name: factor} dict.
+    """
+    review_rates = [config.REVIEW_RATE] if review_rates is None else list(review_rates)
+    occupancy_caps = [config.OCCUPANCY_CAP] if occupancy_caps is None else list(occupancy_caps)
+    if factors is None:
+        factors = config.SCENARIO_FACTORS
+    if not isinstance(factors, dict):
+        factors = {f"x{f:g}": f for f in factors}
+    rows = [
+        {"review_rate": rate, "occupancy_cap": cap, "scenario": name, "factor": factor}
+        for rate, cap, (name, factor) in itertools.product(review_rates, occupancy_caps, factors.items())
+    ]
+    return pd.DataFrame(rows)
+
+def evaluate(inputs, grid, dtype=np.float64):
+    """
+    Occupancy, RevPAR and annual revenue for every listing under every scenario.
+    Returns a dict of (n_listings x n_scenarios) matrices plus the grid.
+    """
+    price = inputs["price"].astype(dtype)
+    # Nights implied per month if every stay were reviewed; shared by all scenarios
+    base = (inputs["reviews_per_month"] * inputs["minimum_nights"] / 30.0).astype(dtype)
+
+    rates = grid["review_rate"].to_numpy(dtype=dtype)
+    caps = grid["occupancy_cap"].to_numpy(dtype=dtype)
+    factors = grid["factor"].to_numpy(dtype=dtype)
+
+    occupancy = np.minimum(base[:, None] / rates[None, :], caps[None, :])
+    revpar = price[:, None] * occupancy
+    revenue = price[:, None] * (365 * factors)[None, :]
+    return {"grid": grid, "occupancy": occupancy, "revpar": revpar, "revenue": revenue}
+
+def summarize(result, by=None, inputs=None):
+    """
+    Per-scenario summary (mean occupancy, mean RevPAR, median and total
+    revenue). With `by` ('neighbourhood' or 'room_type') and `inputs`, the
+    means are broken down per group as well.
+    """
+    grid = result["grid"].reset_index(drop=True)
+    if by is None:
+        return grid.assign(
+            occupancy_mean=result["occupancy"].mean(axis=0),
+            revpar_mean=result["revpar"].mean(axis=0),
+            revenue_median=np.median(result["revenue"], axis=0),
+            revenue_total=result["revenue"].sum(axis=0),
+        )
+
+    codes, groups = pd.factorize(inputs[by].astype(str), sort=True)
+    order = np.argsort(codes, kind="stable")
+    counts = np.bincount(codes, minlength=len(groups))
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    frames = []
+    for metric in ["occupancy", "revpar", "revenue"]:
+        # Group sums of whole rows at once (every group is non-empty)
+        sums = np.add.reduceat(result[metric][order], starts, axis=0)
+        frames.append(pd.DataFrame(sums / counts[:, None], index=groups).stack().rename(f"{metric}_mean"))
+    out = pd.concat(frames, axis=1).reset_index(names=[by, "scenario_idx"])
+    return out.merge(grid, left_on="scenario_idx", right_index=True).drop(columns="scenario_idx")
+
+if __name__ == "__main__":
+    print("⏳ Loading listings...")
+    inputs = load_inputs()
+    grid = scenario_grid(
+        review_rates=np.linspace(0.3, 0.7, 5),
+        occupancy_caps=np.linspace(0.5, 0.9, 5),
+    )
+    start = time.perf_counter()
+    result = evaluate(inputs, grid)
+    elapsed = time.perf_counter() - start
+    print(f"✅ {len(inputs['price'])} listings x {len(grid)} scenarios in {elapsed * 1000:.0f} ms")
+    print(summarize(result).to_string(index=False))
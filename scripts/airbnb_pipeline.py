@@ -0,0 +1,294 @@
+"""
+airbnb_pipeline.py
+
+Purpose:
+Cross-platform pipeline runner (replaces run_analysis_pipeline.ps1).
+
+The stages form a DAG:
+
+    init_db -> load_data -> transform -> export -> visuals
+                                    \\-> analyze
+
+Each stage runs in its own process (so with its own db.get_engine() pool);
+stages whose dependencies are done run concurrently (visuals and analyze
+only need their own inputs, so they overlap). A stage is skipped when it already ran with the same fingerprint
+(its code, raw input files and its dependencies' outputs) and its own
+outputs are still exactly what that run produced. Fingerprints are kept in
+PIPELINE_STATE.
+
+Usage (from scripts/):
+    python -m airbnb_pipeline run                     # whole pipeline, skipping up-to-date stages
+    python -m airbnb_pipeline run --from transform    # rerun transform and everything after it
+    python -m airbnb_pipeline run --to export --force
+    python -m airbnb_pipeline status
+"""
+
+import argparse
+import hashlib
+import importlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from datetime import datetime
+from multiprocessing.connection import wait
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+EXPERIMENTS_DIR = os.path.join(os.path.dirname(SCRIPTS_DIR), "experiments")
+if EXPERIMENTS_DIR not in sys.path:
+    sys.path.append(EXPERIMENTS_DIR)
+
+from sqlalchemy import text
+
+import config
+import db
+import telemetry
+
+PIPELINE_STATE = os.getenv("PIPELINE_STATE", ".pipeline_state.json")
+
+def _database_outputs():
+    try:
+        with db.get_engine().connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return {"database": config.DB_NAME}
+    except Exception:
+        return None
+
+def _load_outputs():
+    """Latest load_id per raw table (None until every table in config.FILES is loaded)."""
+    with db.get_engine().connect() as conn:
+        if not conn.execute(text("SELECT to_regclass('load_manifest')")).scalar():
+            return None
+        loads = dict(conn.execute(text("SELECT table_name, MAX(load_id) FROM load_manifest GROUP BY table_name")).all())
+    tables = [t for f, t in config.FILES.items() if os.path.exists(os.path.join(config.DATA_DIR, f))]
+    return {t: loads[t] for t in tables} if tables and all(t in loads for t in tables) else None
+
+def _transform_outputs():
+    """output_version of every required transform step."""
+    from transform_data import STEPS
+    with db.get_engine().connect() as conn:
+        if not conn.execute(text("SELECT to_regclass('transform_state')")).scalar():
+            return None
+        versions = dict(conn.execute(text("SELECT step, output_version FROM transform_state")).all())
+    required = [s['name'] for s in STEPS if not s.get('optional')]
+    return {s: versions[s] for s in required} if all(s in versions for s in required) else None
+
+def _files(*paths, require_all=True):
+    """Content hash per output file; None if a required file is missing."""
+    from data_access import source_fingerprint
+    found = {p: source_fingerprint(p) for p in paths if os.path.exists(p)}
+    if not found or (require_all and len(found) < len(paths)):
+        return None
+    return found
+
+def _raw_files():
+    from data_access import source_fingerprint
+    paths = [os.path.join(config.DATA_DIR, f) for f in config.FILES]
+    return {os.path.basename(p): source_fingerprint(p) for p in paths if os.path.exists(p)}
+
+# name -> (module, function) to run, upstream stages, source files whose
+# changes invalidate the stage, raw inputs, and the fingerprint of its outputs
+STAGES = {
+    'init_db': {
+        'run': ('init_db', 'init_db'),
+        'after': [],
+        'code': ['init_db.py', 'config.py'],
+        'outputs': _database_outputs,
+    },
+    'load_data': {
+        'run': ('load_data', 'load_data'),
+        'after': ['init_db'],
+        'code': ['load_data.py', 'config.py'],
+        'inputs': _raw_files,
+        'outputs': _load_outputs,
+    },
+    'transform': {
+        'run': ('transform_data', 'transform'),
+        'after': ['load_data'],
+        'code': ['transform_data.py', 'config.py'],
+        'outputs': _transform_outputs,
+    },
+    'export': {
+        'run': ('export_extended', 'export_comprehensive_data'),
+        'after': ['transform'],
+        'code': ['export_extended.py'],
+        'outputs': lambda: _files("comprehensive_data.csv", "seasonal_trends.csv", "cell_stats.csv"),
+    },
+    'visuals': {
+        'run': ('visualize_results', 'generate_visuals'),
+        'after': ['export'],
+        'code': ['visualize_results.py', 'aggregate_cube.py', 'sketches.py', 'data_access.py'],
+        # A chart can fail on its own; the stage counts as done if any chart was written
+        'outputs': lambda: _files("assets/1_top_revenue_hoods.png", "assets/2_room_efficiency.png",
+                                  "assets/3_price_vs_occupancy.png", "assets/4_revenue_scenarios.png",
+                                  "assets/6_pricing_table.png", require_all=False),
+    },
+    'analyze': {
+        'run': ('analyze_ml', 'analyze'),
+        'after': ['transform'],
+        'code': ['analyze_ml.py', 'model_store.py', 'data_access.py'],
+        'outputs': lambda: _files("assets/11_feature_importance.png"),
+    },
+}
+
+def _code_hash(filename):
+    for directory in (SCRIPTS_DIR, EXPERIMENTS_DIR):
+        path = os.path.join(directory, filename)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                return hashlib.sha256(f.read()).hexdigest()
+    return None
+
+def _outputs(name):
+    try:
+        return STAGES[name]['outputs']()
+    except Exception:
+        return None
+
+def stage_key(name):
+    """Fingerprint of everything a stage's result depends on."""
+    stage = STAGES[name]
+    parts = {
+        'code': {f: _code_hash(f) for f in stage['code']},
+        'inputs': stage['inputs']() if 'inputs' in stage else None,
+        'after': {dep: _outputs(dep) for dep in stage['after']},
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+def _load_state():
+    if os.path.exists(PIPELINE_STATE):
+        with open(PIPELINE_STATE) as f:
+            return json.load(f)
+    return {}
+
+def _save_state(state):
+    with open(PIPELINE_STATE, "w") as f:
+        json.dump(state, f, indent=2)
+
+def _is_current(name, key, state):
+    previous = state.get(name)
+    if not previous or previous['key'] != key:
+        return False
+    outputs = _outputs(name)
+    return outputs is not None and outputs == previous['outputs']
+
+def select_stages(start=None, end=None):
+    """Stages downstream of `start` (inclusive) and upstream of `end` (inclusive), in DAG order."""
+    def closure(name, edges):
+        found, todo = {name}, [name]
+        while todo:
+            for nxt in edges(todo.pop()):
+                if nxt not in found:
+                    found.add(nxt)
+                    todo.append(nxt)
+        return found
+
+    selected = set(STAGES)
+    if start:
+        selected &= closure(start, lambda n: [s for s, stage in STAGES.items() if n in stage['after']])
+    if end:
+        selected &= closure(end, lambda n: STAGES[n]['after'])
+    return [name for name in STAGES if name in selected]
+
+def _run_stage(name, stage_kwargs):
+    """
+    Process entry point for one stage. Stage functions print their errors and
+    return False instead of raising, so that is turned into a non-zero exit.
+    """
+    module_name, func_name = STAGES[name]['run']
+    func = getattr(importlib.import_module(module_name), func_name)
+    with telemetry.stage(f"pipeline.{name}"):
+        if func(**stage_kwargs) is False:
+            sys.exit(1)
+
+@telemetry.traced("pipeline")
+def run(start=None, end=None, force=False, jobs=2, kwargs=None):
+    """
+    Runs the selected stages. Independent stages run concurrently (at most
+    `jobs` at a time). `start` is always rerun; `force` reruns every selected
+    stage. Returns True if no stage failed.
+    """
+    kwargs = kwargs or {}
+    selected = select_stages(start, end)
+    print(f"🚀 Pipeline run {telemetry.RUN_ID}: {' -> '.join(selected)}")
+
+    state = _load_state()
+    context = multiprocessing.get_context("spawn")
+    pending, running, done, failed = list(selected), {}, set(), set()
+    begin = time.perf_counter()
+
+    while pending or running:
+        for name in list(pending):
+            after = [dep for dep in STAGES[name]['after'] if dep in selected]
+            if any(dep in failed for dep in after):
+                pending.remove(name)
+                failed.add(name)
+                print(f"⏭ {name} not run (an upstream stage failed).")
+                continue
+            if not all(dep in done for dep in after) or len(running) >= jobs:
+                continue
+
+            pending.remove(name)
+            key = stage_key(name)
+            if not (force or name == start) and _is_current(name, key, state):
+                print(f"⏭ {name} is up to date. Skipping.")
+                done.add(name)
+                continue
+
+            print(f"▶️ Starting {name}...")
+            process = context.Process(target=_run_stage, args=(name, kwargs.get(name, {})), name=name)
+            process.start()
+            running[process.sentinel] = (name, process, key, time.perf_counter())
+
+        if not running:
+            continue
+        for sentinel in wait(list(running)):
+            name, process, key, started = running.pop(sentinel)
+            process.join()
+            outputs = _outputs(name) if process.exitcode == 0 else None
+            elapsed = time.perf_counter() - started
+            if outputs is None:
+                failed.add(name)
+                reason = f"exit code {process.exitcode}" if process.exitcode else "outputs missing"
+                print(f"❌ {name} failed after {elapsed:.1f}s ({reason}).")
+                continue
+            state[name] = {'key': key, 'outputs': outputs, 'ran_at': datetime.now().isoformat()}
+            _save_state(state)
+            done.add(name)
+            print(f"✅ {name} finished in {elapsed:.1f}s.")
+
+    print(f"🏁 Pipeline {'finished' if not failed else 'finished with failures'} "
+          f"in {time.perf_counter() - begin:.1f}s ({len(done)} done, {len(failed)} failed).")
+    return not failed
+
+def status():
+    """Prints whether each stage is up to date."""
+    state = _load_state()
+    for name in STAGES:
+        if name not in state:
+            print(f"   ⚪ {name:<10} never run")
+        elif _is_current(name, stage_key(name), state):
+            print(f"   ✅ {name:<10} up to date (ran {state[name]['ran_at']})")
+        else:
+            print(f"   🔄 {name:<10} stale (ran {state[name]['ran_at']})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the Airbnb analysis pipeline.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run the pipeline")
+    run_parser.add_argument("--from", dest="start", choices=list(STAGES), help="first stage to (re)run")
+    run_parser.add_argument("--to", dest="end", choices=list(STAGES), help="last stage to run")
+    run_parser.add_argument("--force", action="store_true", help="rerun stages even if up to date")
+    run_parser.add_argument("--jobs", type=int, default=2, help="stages to run at the same time")
+    run_parser.add_argument("--load-workers", type=int, default=1,
+                            help=f"load_data worker processes (e.g. {config.LOAD_WORKERS} for all cores)")
+    commands.add_parser("status", help="show which stages are up to date")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        status()
+    else:
+        ok = run(start=args.start, end=args.end, force=args.force, jobs=max(args.jobs, 1),
+                 kwargs={'load_data': {'workers': args.load_workers}})
+        sys.exit(0 if ok else 1)
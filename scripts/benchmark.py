@@ -0,0 +1,174 @@
+"""
+benchmark.py
+
+Purpose:
+Times the pipeline stages on synthetic snapshots (generate_data.py) at
+several multiples of NYC's size, and keeps every result for trend
+comparison.
+
+For each scale the harness:
+1. generates the snapshot into BENCHMARK_DIR/data/scale_<n>/ (reused while
+   generator.json matches the scale and seed);
+2. runs the whole pipeline (airbnb_pipeline.py --force) in a fresh working
+   directory against a separate database (DB_NAME, default airbnb_bench),
+   with empty data/model caches, so every stage does its full work;
+3. reads the stage timings back from the run's telemetry trace and appends
+   them to BENCHMARK_DIR/results.csv.
+
+Stages run one at a time by default (--jobs 1), so each timing is the
+stage's own.
+
+Usage:
+    python benchmark.py                      # 1x, 10x and 100x
+    python benchmark.py --scales 0.1 1       # quick run
+    python benchmark.py --history            # latest vs previous run per scale/stage
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+import telemetry
+from generate_data import generate
+
+BENCHMARK_DIR = os.getenv("BENCHMARK_DIR", "benchmarks")
+RESULTS_FILE = os.path.join(BENCHMARK_DIR, "results.csv")
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SCALES = [1, 10, 100]
+
+# Pipeline stage -> benchmarked function
+STAGES = {
+    "load_data": "load_data",
+    "transform": "transform",
+    "export": "export_comprehensive_data",
+    "visuals": "generate_visuals",
+    "analyze": "analyze",
+}
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPTS_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def ensure_data(scale, seed):
+    """The snapshot for `scale`, generated unless an identical one exists."""
+    data_dir = os.path.abspath(os.path.join(BENCHMARK_DIR, "data", f"scale_{scale:g}"))
+    manifest_path = os.path.join(data_dir, "generator.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest["scale"] == scale and manifest["seed"] == seed:
+            print(f"♻️ Reusing {scale:g}x snapshot in '{data_dir}'.")
+            return data_dir, manifest
+    return data_dir, generate(scale=scale, out_dir=data_dir, seed=seed)
+
+def run_scale(scale, seed=42, database="airbnb_bench", jobs=1, load_workers=1, keep=False):
+    """Runs the pipeline on the `scale` snapshot. Returns one result row per stage."""
+    data_dir, manifest = ensure_data(scale, seed)
+    os.makedirs(BENCHMARK_DIR, exist_ok=True)
+    work_dir = os.path.abspath(tempfile.mkdtemp(prefix=f"run_{scale:g}x_", dir=BENCHMARK_DIR))
+    run_id = f"bench-{datetime.now():%Y%m%d-%H%M%S}-{scale:g}x"
+    env = {
+        **os.environ,
+        "DATA_DIR": data_dir,
+        "DB_NAME": database,
+        "PIPELINE_RUN_ID": run_id,
+        "TRACE_DIR": os.path.abspath(telemetry.TRACE_DIR),
+        "DATA_CACHE_DIR": os.path.join(work_dir, ".cache"),
+        "MODEL_DIR": os.path.join(work_dir, "models"),
+        "PIPELINE_STATE": os.path.join(work_dir, ".pipeline_state.json"),
+        "PYTHONPATH": os.pathsep.join(filter(None, [SCRIPTS_DIR, os.environ.get("PYTHONPATH")])),
+    }
+
+    print(f"⏱ Benchmarking {scale:g}x ({manifest['listings']:,} listings, {manifest['calendar_rows']:,} calendar rows)...")
+    start = time.perf_counter()
+    try:
+        process = subprocess.run(
+            [sys.executable, "-m", "airbnb_pipeline", "run", "--force", "--jobs", str(jobs),
+             "--load-workers", str(load_workers)],
+            cwd=work_dir, env=env,
+        )
+    finally:
+        if not keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    elapsed = time.perf_counter() - start
+
+    events = {e["name"]: e for e in telemetry.load_trace(run_id) if e["type"] == "stage"}
+    base = {
+        "run_id": run_id,
+        "run_at": datetime.now().isoformat(timespec="seconds"),
+        "git_rev": _git_revision(),
+        "scale": scale,
+        "listings": manifest["listings"],
+        "calendar_rows": manifest["calendar_rows"],
+    }
+    rows = []
+    for stage, function in STAGES.items():
+        event = events.get(f"pipeline.{stage}", {})
+        rows.append({
+            **base,
+            "stage": function,
+            "wall_s": event.get("wall_s"),
+            "cpu_s": event.get("cpu_s"),
+            "peak_rss_mb": event.get("peak_rss_mb"),
+            "status": event.get("status", "not run"),
+        })
+    rows.append({**base, "stage": "pipeline", "wall_s": round(elapsed, 4), "cpu_s": None, "peak_rss_mb": None,
+                 "status": "ok" if process.returncode == 0 else "error"})
+    return rows
+
+def record(rows):
+    """Appends result rows to RESULTS_FILE."""
+    os.makedirs(BENCHMARK_DIR, exist_ok=True)
+    frame = pd.DataFrame(rows)
+    frame.to_csv(RESULTS_FILE, mode="a", header=not os.path.exists(RESULTS_FILE), index=False)
+    return frame
+
+def history():
+    """Latest vs previous wall time for every scale and stage."""
+    if not os.path.exists(RESULTS_FILE):
+        print(f"❌ No results in '{RESULTS_FILE}'.")
+        return
+    results = pd.read_csv(RESULTS_FILE)
+    print(f"📈 Benchmark history ({results['run_id'].nunique()} runs)")
+    results = results.dropna(subset=["wall_s"])
+    for (scale, stage), group in results.groupby(["scale", "stage"], sort=True):
+        group = group.sort_values("run_at")
+        latest = group.iloc[-1]
+        revision = latest["git_rev"] if pd.notna(latest["git_rev"]) else "no git"
+        line = f"   {scale:>6g}x {stage:<26} {latest['wall_s']:>9.2f}s ({revision})"
+        if len(group) > 1 and group.iloc[-2]["wall_s"] > 0:
+            before = group.iloc[-2]["wall_s"]
+            change = (latest["wall_s"] - before) / before * 100
+            line += f"  was {before:.2f}s ({change:+.0f}%){' ⚠️' if change > 20 else ''}"
+        print(line)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline on synthetic NYC-scale snapshots.")
+    parser.add_argument("--scales", type=float, nargs="+", default=SCALES, help="multiples of NYC's size")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database", default="airbnb_bench", help="database the benchmark may overwrite")
+    parser.add_argument("--jobs", type=int, default=1, help="pipeline stages run concurrently")
+    parser.add_argument("--load-workers", type=int, default=1)
+    parser.add_argument("--keep", action="store_true", help="keep each run's working directory")
+    parser.add_argument("--history", action="store_true", help="show stored results instead of running")
+    args = parser.parse_args()
+
+    if args.history:
+        history()
+    else:
+        for scale in args.scales:
+            frame = record(run_scale(scale, seed=args.seed, database=args.database, jobs=args.jobs,
+                                     load_workers=args.load_workers, keep=args.keep))
+            print(frame[["stage", "wall_s", "cpu_s", "peak_rss_mb", "status"]].to_string(index=False))
+        print(f"✅ Results appended to '{RESULTS_FILE}'.")
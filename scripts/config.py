@@ -12,8 +12,41 @@ DB_NAME = os.getenv("DB_NAME", "airbnb")
 DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
 # File Paths
-DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+# Folder with the raw snapshot CSVs (e.g. a generate_data.py output for benchmarks)
+DATA_DIR = os.getenv("DATA_DIR", os.path.dirname(os.path.abspath(__file__)))
+# Add one entry per city snapshot (e.g. "listings_tokyo.csv": "raw_listings_tokyo")
 FILES = {
     "listings_nyc.csv": "raw_listings_nyc",
     "calendar_nyc.csv": "raw_calendar_nyc"
 }
+
+# Natural keys of the raw tables (used by the incremental loader to upsert changed rows)
+TABLE_KEYS = {
+    "raw_listings_nyc": ["id"],
+    "raw_calendar_nyc": ["listing_id", "date"]
+}
+
+# Parallel Ingestion
+# Files listed here have no quoted multi-line fields, so they can be split into
+# byte-range shards at line boundaries and loaded by several workers at once.
+# (Listings carry free-text descriptions with embedded newlines and are loaded whole.)
+SHARDABLE_FILES = {"calendar_nyc.csv"}
+SHARD_SIZE_MB = int(os.getenv("SHARD_SIZE_MB", "64"))
+LOAD_WORKERS = int(os.getenv("LOAD_WORKERS", str(os.cpu_count() or 1)))
+
+# Yield Model (yield_analysis in transform_data.py, experiments/yield_engine.py)
+# Occupancy = MIN((reviews_per_month / REVIEW_RATE) * minimum_nights / 30, OCCUPANCY_CAP)
+REVIEW_RATE = 0.5       # share of stays that leave a review
+OCCUPANCY_CAP = 0.70    # conservative ceiling on estimated occupancy
+# Annual revenue scenarios: price * 365 * factor (column revenue_<name>)
+SCENARIO_FACTORS = {"bear": 0.40, "base": 0.60, "bull": 0.80}
+
+# Connection Pool (db.py, shared by every stage)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+DB_POOL_RECYCLE_S = int(os.getenv("DB_POOL_RECYCLE_S", "1800"))
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))  # 0 = no limit
+DB_APPLICATION_NAME = os.getenv("DB_APPLICATION_NAME", "airbnb_pipeline")
+
+# Embedded Backend (duckdb_backend.py): DuckDB database file the transforms write to
+DUCKDB_PATH = os.getenv("DUCKDB_PATH", "airbnb.duckdb")
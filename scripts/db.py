@@ -0,0 +1,91 @@
+"""
+db.py
+
+Purpose:
+One pooled SQLAlchemy engine per database and process, shared by all the
+code of that process instead of each script calling create_engine() itself.
+
+Reuse is per stage only: airbnb_pipeline.py runs every stage in its own
+spawned process, so each stage starts with a cold pool and the connection
+metrics in a trace cover that one stage.
+
+- QueuePool sized by config.DB_POOL_SIZE / DB_MAX_OVERFLOW, with pre-ping so
+  a connection dropped by the server is replaced instead of failing a stage.
+- Every session sets application_name (visible in pg_stat_activity) and,
+  if configured, a statement_timeout.
+- Connection metrics (new connections, time spent connecting, checkouts)
+  are counted per process and recorded per stage by telemetry.py.
+
+Usage:
+    engine = db.get_engine()              # the analysis database
+    admin = db.get_engine("postgres")     # e.g. to CREATE DATABASE
+"""
+
+import os
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+
+import config
+import telemetry
+
+_engines = {}  # (pid, database, pool options) -> Engine
+_metrics = {"db_connects": 0, "db_connect_s": 0.0, "db_checkouts": 0}
+
+def connection_metrics():
+    """Connection counters of this process since it started."""
+    return dict(_metrics)
+
+telemetry.register_counters(connection_metrics)
+
+def _connect_args():
+    options = {"application_name": config.DB_APPLICATION_NAME}
+    if config.DB_STATEMENT_TIMEOUT_MS:
+        options["options"] = f"-c statement_timeout={config.DB_STATEMENT_TIMEOUT_MS}"
+    return options
+
+def _instrument(engine):
+    @event.listens_for(engine, "do_connect")
+    def _before_connect(dialect, record, cargs, cparams):
+        record.info["connect_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "connect")
+    def _connected(dbapi_connection, record):
+        _metrics["db_connects"] += 1
+        _metrics["db_connect_s"] += time.perf_counter() - record.info.pop("connect_started", time.perf_counter())
+
+    @event.listens_for(engine, "checkout")
+    def _checked_out(dbapi_connection, record, proxy):
+        _metrics["db_checkouts"] += 1
+
+def get_engine(database=None, **pool_options):
+    """
+    The shared engine for `database` (config.DB_NAME by default). pool_options
+    override the configured pool (e.g. pool_size=1 for a worker process).
+    """
+    key = (os.getpid(), database, tuple(sorted(pool_options.items())))
+    if key not in _engines:
+        url = make_url(config.DATABASE_URL)
+        if database:
+            url = url.set(database=database)
+        options = {
+            "pool_size": config.DB_POOL_SIZE,
+            "max_overflow": config.DB_MAX_OVERFLOW,
+            "pool_pre_ping": True,
+            "pool_recycle": config.DB_POOL_RECYCLE_S,
+            **pool_options,
+        }
+        engine = create_engine(url, connect_args=_connect_args(), **options)
+        _instrument(engine)
+        _engines[key] = engine
+    return _engines[key]
+
+def _after_fork():
+    # A forked child (e.g. load_data's shard workers, which fork on Linux) must
+    # not reuse the parent's sockets; it opens its own
+    for engine in _engines.values():
+        engine.dispose(close=False)
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
@@ -0,0 +1,206 @@
+"""
+duckdb_backend.py
+
+Purpose:
+Run the transform steps of transform_data.py with DuckDB, an embedded
+columnar engine, straight over the raw CSV (or Parquet) files: no server,
+no load step. Handy for ad-hoc reruns on a laptop or batch host.
+
+The step SQL is the Postgres SQL of transform_data.STEPS, passed through a
+small dialect shim (translate()). The raw tables are views over the files,
+typed like load_data.py types them (TYPED_COLUMNS, GENERATED_COLUMNS).
+Every step is rebuilt on each run (no transform_state / delta path), and
+materialized views become plain tables.
+
+Usage:
+    python duckdb_backend.py               # build the tables in DUCKDB_PATH
+    python duckdb_backend.py --benchmark   # Postgres (load + transform) vs DuckDB on the same files
+"""
+
+import argparse
+import os
+import re
+import time
+
+import duckdb
+import pandas as pd
+
+import config
+import telemetry
+from load_data import GENERATED_COLUMNS, TYPED_COLUMNS
+from transform_data import STEPS
+
+# Postgres -> DuckDB rewrites, applied in order. regexp_replace(..., 'g') and
+# the ordered-set aggregates' FILTER clauses need none: DuckDB accepts them.
+_TO_CHAR_FORMATS = [("YYYY", "%Y"), ("HH24", "%H"), ("MM", "%m"), ("DD", "%d"), ("MI", "%M"), ("SS", "%S")]
+
+def _strftime_format(pattern):
+    for pg, duck in _TO_CHAR_FORMATS:
+        pattern = pattern.replace(pg, duck)
+    return pattern
+
+DIALECT_RULES = [
+    # Planner settings have no DuckDB equivalent
+    (re.compile(r"^\s*SET\s+LOCAL\b[^;]*", re.IGNORECASE | re.MULTILINE), ""),
+    (re.compile(r"\bTO_CHAR\((.+?),\s*'([^']*)'\)", re.IGNORECASE),
+     lambda m: f"strftime({m[1]}, '{_strftime_format(m[2])}')"),
+    (re.compile(r"\bpercentile_cont\(([^)]*)\)\s*WITHIN\s+GROUP\s*\(\s*ORDER\s+BY\s+([^)]*)\)", re.IGNORECASE),
+     lambda m: f"quantile_cont({m[2]}, {m[1]})"),
+    # FLOAT is 8 bytes in Postgres but 4 in DuckDB; NUMERIC has no fixed precision in Postgres
+    (re.compile(r"\b(FLOAT|NUMERIC)\b", re.IGNORECASE), "DOUBLE"),
+    (re.compile(r"\bMATERIALIZED\s+VIEW\b", re.IGNORECASE), "TABLE"),
+    (re.compile(r"\s+CASCADE\b", re.IGNORECASE), ""),
+]
+
+def translate(sql):
+    """Rewrites a Postgres statement (as written in transform_data.py) for DuckDB."""
+    for pattern, replacement in DIALECT_RULES:
+        sql = pattern.sub(replacement, sql)
+    return sql
+
+def _source(filename, data_dir):
+    """read_parquet() for <stem>.parquet (file or dataset directory) if present, else read_csv()."""
+    stem = os.path.join(data_dir, os.path.splitext(filename)[0])
+    if os.path.isdir(stem + ".parquet"):
+        return f"read_parquet('{stem}.parquet/**/*.parquet', hive_partitioning = true)"
+    if os.path.exists(stem + ".parquet"):
+        return f"read_parquet('{stem}.parquet')"
+    path = os.path.join(data_dir, filename)
+    return f"read_csv('{path}', header = true)" if os.path.exists(path) else None
+
+def raw_view_sql(table_name, source):
+    """A view over `source` with the column types and generated columns load_data.py adds."""
+    typed = TYPED_COLUMNS.get(table_name, {})
+    columns = ["*"]
+    if typed:
+        columns = ["* REPLACE (" + ", ".join(f'CAST("{c}" AS {t}) AS "{c}"' for c, t in typed.items()) + ")"]
+    for col, definition in GENERATED_COLUMNS.get(table_name, {}).items():
+        expression = re.search(r"GENERATED ALWAYS AS \((.*)\) STORED", definition).group(1)
+        columns.append(f'{translate(expression)} AS "{col}"')
+    return f"CREATE OR REPLACE VIEW {table_name} AS SELECT {', '.join(columns)} FROM {source}"
+
+def _step_sql(step):
+    if 'matview' in step:
+        query, _ = step['matview']
+        return f"CREATE OR REPLACE TABLE {step['name']} AS {query}"
+    return step['sql']
+
+def _execute(con, query_text):
+    for stmt in (s.strip() for s in query_text.split(';')):
+        if stmt:
+            con.execute(translate(stmt))
+
+@telemetry.traced("transform.duckdb")
+def transform(database=None, data_dir=None):
+    """Builds every transform_data step's output in the DuckDB file `database`. Returns the connection."""
+    database = database or config.DUCKDB_PATH
+    data_dir = data_dir or config.DATA_DIR
+    print(f"🦆 Running transformations with DuckDB ({database})...")
+    con = duckdb.connect(database)
+
+    for filename, table_name in config.FILES.items():
+        source = _source(filename, data_dir)
+        if source is None:
+            print(f"⚠️ Warning: {filename} not found. Skipping.")
+            continue
+        con.execute(raw_view_sql(table_name, source))
+
+    for step in STEPS:
+        print(step['label'])
+        start = time.perf_counter()
+        try:
+            with telemetry.stage(f"transform.duckdb.{step['name']}") as record:
+                _execute(con, _step_sql(step))
+                record['rows'] = con.execute(f"SELECT COUNT(*) FROM {step['outputs'][0]}").fetchone()[0]
+        except duckdb.Error as e:
+            if step.get('optional'):
+                print(f"⚠️ {step['name']} skipped (Missing input data?): {e}")
+                continue
+            raise
+        print(f"   ⏱ {step['outputs'][0]}: {record['rows']} rows in {time.perf_counter() - start:.2f}s\n")
+
+    print("✅ DuckDB Transformations Complete!")
+    return con
+
+# --- Benchmark --------------------------------------------------------------
+
+# Outputs compared row by row between the backends: table -> key columns
+COMPARED_TABLES = {
+    "clean_listings": ["id"],
+    "yield_analysis": ["id"],
+    "seasonality_stats": ["month_year"],
+    "neighbourhood_stats": ["city", "neighbourhood"],
+    "cell_stats": ["zoom", "city", "x", "y"],
+}
+
+def compare_outputs(con, engine):
+    """Per table: row counts in both backends and the largest relative difference of any numeric column."""
+    rows = []
+    for table, keys in COMPARED_TABLES.items():
+        try:
+            pg = pd.read_sql(f"SELECT * FROM {table}", engine)
+            duck = con.execute(f"SELECT * FROM {table}").df()
+        except Exception as e:
+            print(f"⚠️ {table} not compared: {e}")
+            continue
+        merged = pg.merge(duck, on=keys, how="outer", suffixes=("_pg", "_duck"), indicator=True)
+        worst = 0.0
+        for col in pg.columns:
+            if col in keys or not pd.api.types.is_numeric_dtype(pg[col]):
+                continue
+            a = merged[f"{col}_pg"].astype(float)
+            b = merged[f"{col}_duck"].astype(float)
+            diff = ((a - b).abs() / a.abs().clip(lower=1e-9)).where(a.notna() & b.notna())
+            worst = max(worst, float(diff.max()) if diff.notna().any() else 0.0)
+        rows.append({
+            "table": table,
+            "postgres_rows": len(pg),
+            "duckdb_rows": len(duck),
+            "unmatched_rows": int((merged["_merge"] != "both").sum()),
+            "max_rel_diff": worst,
+        })
+    return pd.DataFrame(rows)
+
+def benchmark(load=True):
+    """Times the Postgres path (COPY load + full transform) and DuckDB over the same raw files."""
+    import db
+    from load_data import load_data
+    from transform_data import transform as transform_postgres
+
+    timings = {}
+    if load:
+        start = time.perf_counter()
+        load_data()
+        timings["postgres load"] = time.perf_counter() - start
+    start = time.perf_counter()
+    transform_postgres(full_refresh=True)
+    timings["postgres transform"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    con = transform()
+    timings["duckdb transform (from files)"] = time.perf_counter() - start
+
+    print("==================================================")
+    print("🏁 BACKEND BENCHMARK")
+    print("==================================================")
+    for name, seconds in timings.items():
+        print(f"   {name:<32} {seconds:>8.2f}s")
+    postgres = timings.get("postgres load", 0) + timings["postgres transform"]
+    duck = timings["duckdb transform (from files)"]
+    print(f"   DuckDB is {postgres / duck:.1f}x {'faster' if duck < postgres else 'slower'} end to end.")
+    print("\n   Output agreement:")
+    print(compare_outputs(con, db.get_engine()).to_string(index=False))
+    con.close()
+    return timings
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the transform steps with DuckDB over the raw files.")
+    parser.add_argument("--benchmark", action="store_true", help="compare against the Postgres path")
+    parser.add_argument("--no-load", action="store_false", dest="load",
+                        help="benchmark the Postgres transform only (data already loaded)")
+    parser.add_argument("--database", default=None, help=f"DuckDB file (default {config.DUCKDB_PATH})")
+    args = parser.parse_args()
+    if args.benchmark:
+        benchmark(load=args.load)
+    else:
+        transform(database=args.database).close()
@@ -1,64 +1,218 @@
+import argparse
+import itertools
+import os
+import sys
+import time
 import pandas as pd
-from sqlalchemy import create_engine
-import config
+from sqlalchemy import text
+import db
+import telemetry
 
-def export_comprehensive_data():
+# Joining clean_listings (Profile) with yield_analysis (Financials)
+COMPREHENSIVE_QUERY = """
+SELECT
+    cl.id,
+    cl.city,
+    cl.neighbourhood,
+    cl.latitude,
+    cl.longitude,
+    cl.room_type,
+    cl.property_type,
+    cl.accommodates,
+    cl.rating,
+    cl.reviews,
+    ya.occupancy_rate,
+    ya.revpar,
+    ya.price_clean as nightly_rate,
+    ya.revenue_bear as annual_revenue_conservative,
+    ya.revenue_base as annual_revenue,
+    ya.revenue_bull as annual_revenue_optimistic
+FROM clean_listings cl
+JOIN yield_analysis ya ON cl.id = ya.id
+"""
+
+# Rows fetched per round trip from the server-side cursor
+BATCH_SIZE = 50000
+
+def _report(output, nbytes, elapsed):
+    rate = nbytes / elapsed / (1024 * 1024) if elapsed > 0 else 0
+    rss = telemetry.peak_rss_mb()
+    rss_text = f"{rss:,.0f} MB" if rss is not None else "n/a"
+    print(f"   ⏱ {output}: {nbytes / (1024 * 1024):,.1f} MB in {elapsed:.1f}s ({rate:,.1f} MB/s), peak RSS {rss_text}")
+
+class _CountingWriter:
+    """File wrapper that counts the bytes COPY writes through it."""
+
+    def __init__(self, f):
+        self._f = f
+        self.bytes_written = 0
+
+    def write(self, data):
+        self.bytes_written += len(data)
+        return self._f.write(data)
+
+def export_csv_stream(engine, query=COMPREHENSIVE_QUERY, output_file="comprehensive_data.csv"):
+    """
+    Streams `query` straight into output_file with COPY (...) TO STDOUT.
+    Rows never become Python objects, so memory stays flat however large
+    the result is. Returns the number of bytes written.
+    """
+    raw_conn = engine.raw_connection()
+    try:
+        cursor = raw_conn.cursor()
+        with open(output_file, "wb") as f:
+            writer = _CountingWriter(f)
+            cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)", writer)
+        cursor.close()
+        raw_conn.commit()
+    finally:
+        raw_conn.close()
+    return writer.bytes_written
+
+def _parquet_schema():
+    """Explicit Arrow schema so every batch (and every reader) gets the same dtypes."""
+    import pyarrow as pa
+    return pa.schema([
+        ('id', pa.int64()),
+        ('city', pa.string()),
+        ('neighbourhood', pa.string()),
+        ('latitude', pa.float64()),
+        ('longitude', pa.float64()),
+        ('room_type', pa.string()),
+        ('property_type', pa.string()),
+        ('accommodates', pa.int64()),
+        ('rating', pa.float64()),
+        ('reviews', pa.int64()),
+        ('occupancy_rate', pa.float64()),
+        ('revpar', pa.float64()),
+        ('nightly_rate', pa.float64()),
+        ('annual_revenue_conservative', pa.float64()),
+        ('annual_revenue', pa.float64()),
+        ('annual_revenue_optimistic', pa.float64()),
+    ])
+
+def export_parquet(engine, query=COMPREHENSIVE_QUERY, output_dir="comprehensive_data", batch_size=BATCH_SIZE):
+    """
+    Streams `query` through a server-side cursor and writes a zstd-compressed
+    Parquet dataset partitioned by city/neighbourhood (hive layout), e.g.
+    comprehensive_data/city=NYC/neighbourhood=Harlem/part-0.parquet.
+    Readers can load only the columns and partitions they need:
+        pd.read_parquet("comprehensive_data", columns=[...], filters=[("neighbourhood", "=", "Harlem")])
+    Returns the number of rows written.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    schema = _parquet_schema()
+    rows = 0
+
+    with engine.connect().execution_options(stream_results=True, max_row_buffer=batch_size) as conn:
+        chunks = pd.read_sql(text(query), conn, chunksize=batch_size)
+
+        def batches():
+            nonlocal rows
+            for chunk in chunks:
+                rows += len(chunk)
+                yield pa.RecordBatch.from_pandas(chunk, schema=schema, preserve_index=False)
+
+        batch_iter = batches()
+        first = next(batch_iter, None)
+        if first is None:
+            return 0
+
+        ds.write_dataset(
+            itertools.chain([first], batch_iter),
+            output_dir,
+            schema=schema,
+            format="parquet",
+            partitioning=["city", "neighbourhood"],
+            partitioning_flavor="hive",
+            existing_data_behavior="delete_matching",
+            file_options=ds.ParquetFileFormat().make_write_options(compression="zstd"),
+        )
+    return rows
+
+def _dir_size(path):
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names)
+
+@telemetry.traced("export")
+def export_comprehensive_data(fmt="csv", stream=True):
     """
-    Exports a rich dataset including room types, ratings, and capacity 
+    Exports a rich dataset including room types, ratings, and capacity
     to support the expanded '10 Insights' dashboard.
+
+    fmt: 'csv' writes comprehensive_data.csv, 'parquet' writes a typed,
+         partitioned Parquet dataset to comprehensive_data/ (needs pyarrow).
+    stream: for CSV, COPY the result straight to disk (constant memory)
+            instead of materializing it with pd.read_sql first.
+    Returns False if the export failed.
     """
     print("⏳ Starting Extended Data Export...")
-    
+
     try:
-        engine = create_engine(config.DATABASE_URL)
+        engine = db.get_engine()
         connection = engine.connect()
         connection.close()
     except Exception as e:
         print(f"❌ DB Connection Failed: {e}")
-        return
-
-    # Joining clean_listings (Profile) with yield_analysis (Financials)
-    query = """
-    SELECT 
-        cl.id,
-        cl.city,
-        cl.neighbourhood,
-        cl.latitude,
-        cl.longitude,
-        cl.room_type,
-        cl.property_type,
-        cl.accommodates,
-        cl.rating,
-        cl.reviews,
-        ya.occupancy_rate,
-        ya.revpar,
-        ya.price_clean as nightly_rate,
-        ya.revenue_bear as annual_revenue_conservative,
-        ya.revenue_base as annual_revenue,
-        ya.revenue_bull as annual_revenue_optimistic
-    FROM clean_listings cl
-    JOIN yield_analysis ya ON cl.id = ya.id
-    """
-    
+        return False
+
     try:
         print("⏳ Extracting comprehensive dataset...")
-        df = pd.read_sql(query, engine)
-        
-        output_file = "comprehensive_data.csv"
-        df.to_csv(output_file, index=False)
-        
-        print(f"✅ Successfully exported {len(df)} records to '{output_file}'.")
-        
+        start = time.perf_counter()
+        with telemetry.stage("export.comprehensive", format=fmt, stream=stream) as record:
+            if fmt == "parquet":
+                output_dir = "comprehensive_data"
+                rows = export_parquet(engine, output_dir=output_dir)
+                print(f"✅ Successfully exported {rows} records to '{output_dir}/' (Parquet, partitioned by city/neighbourhood).")
+                record.update(rows=rows, bytes=_dir_size(output_dir))
+                _report(output_dir, record['bytes'], time.perf_counter() - start)
+            elif stream:
+                output_file = "comprehensive_data.csv"
+                nbytes = export_csv_stream(engine, output_file=output_file)
+                print(f"✅ Successfully streamed the dataset to '{output_file}'.")
+                record['bytes'] = nbytes
+                _report(output_file, nbytes, time.perf_counter() - start)
+            else:
+                df = pd.read_sql(COMPREHENSIVE_QUERY, engine)
+
+                output_file = "comprehensive_data.csv"
+                df.to_csv(output_file, index=False)
+
+                print(f"✅ Successfully exported {len(df)} records to '{output_file}'.")
+                record.update(rows=len(df), bytes=os.path.getsize(output_file))
+                _report(output_file, record['bytes'], time.perf_counter() - start)
+
         # 2. Export Seasonality Data
         print("⏳ Extracting Seasonality Data...")
-        season_df = pd.read_sql("SELECT * FROM seasonality_stats", engine)
-        season_df.to_csv("seasonal_trends.csv", index=False)
+        with telemetry.stage("export.seasonality") as record:
+            season_df = pd.read_sql("SELECT * FROM seasonality_stats", engine)
+            season_df.to_csv("seasonal_trends.csv", index=False)
+            record['rows'] = len(season_df)
         print(f"✅ Successfully exported {len(season_df)} months of data to 'seasonal_trends.csv'.")
-        
+
+        # 3. Export Map Cell Rollups (heatmaps at zoom 10/12/14/16)
+        print("⏳ Extracting Map Cell Rollups...")
+        with telemetry.stage("export.cells") as record:
+            cells_df = pd.read_sql("SELECT * FROM cell_stats ORDER BY zoom, x, y", engine)
+            cells_df.to_csv("cell_stats.csv", index=False)
+            record['rows'] = len(cells_df)
+        print(f"✅ Successfully exported {len(cells_df)} map cells to 'cell_stats.csv'.")
+
         print("📊 Ready for visualization engine.")
-        
+        return True
+
+    except ImportError as e:
+        print(f"❌ Parquet export needs pyarrow (pip install pyarrow): {e}")
     except Exception as e:
         print(f"❌ Export Failed: {e}")
+    return False
 
 if __name__ == "__main__":
-    export_comprehensive_data()
+    parser = argparse.ArgumentParser(description="Export the analysis dataset.")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv", dest="fmt")
+    parser.add_argument("--no-stream", action="store_false", dest="stream",
+                        help="load the CSV result into pandas before writing (previous behaviour)")
+    args = parser.parse_args()
+    sys.exit(0 if export_comprehensive_data(fmt=args.fmt, stream=args.stream) else 1)
@@ -0,0 +1,250 @@
+"""
+generate_data.py
+
+Purpose:
+Synthetic Inside Airbnb snapshot (listings_nyc.csv, calendar_nyc.csv) at a
+configurable multiple of NYC's size, so the pipeline can be benchmarked
+without the real files.
+
+Scale 1 is ~NYC: NYC_LISTINGS listings and CALENDAR_DAYS calendar rows each.
+The files follow the Inside Airbnb layout and quirks:
+- listings spread over real NYC neighbourhoods (weighted, with coordinates
+  around each neighbourhood's centre and a neighbourhood price level);
+- room type mix, property types and capacity per room type;
+- prices as text ("$1,234.00"), lognormal per room type, with empty prices,
+  $0 listings and placeholder-style outliers ($5,000 - $20,000);
+- review counts with many zeros, and null ratings / reviews per month for
+  listings without reviews;
+- multi-line, quoted free text in name/description;
+- calendar rows with 't'/'f' availability and seasonal, weekend-priced text prices.
+
+Output is deterministic for a given scale and seed. Rows are generated and
+written in chunks, so memory stays flat at any scale (100x is ~3.7M listings
+and ~1.4B calendar rows, roughly 60 GB of CSV).
+
+Usage:
+    python generate_data.py --scale 1 --out bench_data/
+    python generate_data.py --scale 0.1 --seed 7
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+NYC_LISTINGS = 37500
+CALENDAR_DAYS = 365
+CALENDAR_START = "2025-01-01"
+LISTINGS_CHUNK = 20000
+CALENDAR_CHUNK = 10000  # listings per calendar chunk (x CALENDAR_DAYS rows)
+
+PRICE_NULL_SHARE = 0.05
+PRICE_ZERO_SHARE = 0.001
+PRICE_OUTLIER_SHARE = 0.004
+
+# (neighbourhood, borough, latitude, longitude, weight, price level)
+NEIGHBOURHOODS = [
+    ("Bedford-Stuyvesant", "Brooklyn", 40.6872, -73.9418, 7.0, 0.80),
+    ("Williamsburg", "Brooklyn", 40.7081, -73.9571, 6.0, 1.10),
+    ("Midtown", "Manhattan", 40.7549, -73.9840, 6.0, 1.45),
+    ("Harlem", "Manhattan", 40.8116, -73.9465, 5.0, 0.85),
+    ("Hell's Kitchen", "Manhattan", 40.7638, -73.9918, 5.0, 1.40),
+    ("Upper West Side", "Manhattan", 40.7870, -73.9754, 4.0, 1.20),
+    ("Upper East Side", "Manhattan", 40.7736, -73.9566, 4.0, 1.20),
+    ("East Village", "Manhattan", 40.7265, -73.9815, 4.0, 1.25),
+    ("Bushwick", "Brooklyn", 40.6958, -73.9171, 4.0, 0.80),
+    ("Crown Heights", "Brooklyn", 40.6694, -73.9422, 4.0, 0.80),
+    ("Chelsea", "Manhattan", 40.7465, -74.0014, 3.0, 1.50),
+    ("Lower East Side", "Manhattan", 40.7150, -73.9843, 3.0, 1.20),
+    ("Financial District", "Manhattan", 40.7075, -74.0113, 3.0, 1.50),
+    ("Washington Heights", "Manhattan", 40.8417, -73.9394, 3.0, 0.75),
+    ("East Harlem", "Manhattan", 40.7957, -73.9389, 3.0, 0.85),
+    ("Astoria", "Queens", 40.7644, -73.9235, 3.0, 0.85),
+    ("West Village", "Manhattan", 40.7358, -74.0036, 2.0, 1.55),
+    ("Murray Hill", "Manhattan", 40.7479, -73.9757, 2.0, 1.30),
+    ("Greenpoint", "Brooklyn", 40.7305, -73.9515, 2.0, 1.05),
+    ("Park Slope", "Brooklyn", 40.6710, -73.9814, 2.0, 1.10),
+    ("Flatbush", "Brooklyn", 40.6409, -73.9624, 2.0, 0.70),
+    ("Clinton Hill", "Brooklyn", 40.6897, -73.9661, 2.0, 1.00),
+    ("Long Island City", "Queens", 40.7447, -73.9485, 2.0, 1.10),
+    ("Flushing", "Queens", 40.7675, -73.8331, 2.0, 0.70),
+    ("SoHo", "Manhattan", 40.7233, -74.0030, 1.0, 1.80),
+    ("Chinatown", "Manhattan", 40.7158, -73.9970, 1.0, 1.10),
+    ("Prospect-Lefferts Gardens", "Brooklyn", 40.6591, -73.9501, 1.0, 0.75),
+    ("Jamaica", "Queens", 40.7027, -73.7890, 1.0, 0.65),
+    ("Ridgewood", "Queens", 40.7043, -73.9018, 1.0, 0.75),
+    ("Mott Haven", "Bronx", 40.8091, -73.9229, 1.0, 0.70),
+    ("Concourse", "Bronx", 40.8270, -73.9220, 1.0, 0.60),
+    ("St. George", "Staten Island", 40.6437, -74.0736, 0.5, 0.70),
+]
+
+# room type -> (share, median nightly price, property types, typical capacity)
+ROOM_TYPES = {
+    "Entire home/apt": (0.55, 210.0, ["Entire rental unit", "Entire home", "Entire condo", "Entire loft"], 3.5),
+    "Private room": (0.42, 95.0, ["Private room in rental unit", "Private room in home", "Private room in townhouse"], 1.6),
+    "Shared room": (0.015, 65.0, ["Shared room in rental unit", "Shared room in hostel"], 1.2),
+    "Hotel room": (0.015, 260.0, ["Room in hotel", "Room in boutique hotel"], 2.0),
+}
+PRICE_SIGMA = 0.5
+
+# Calendar price index per month (Jan..Dec) and the Friday/Saturday premium
+SEASON = np.array([0.90, 0.88, 0.95, 1.00, 1.05, 1.12, 1.15, 1.12, 1.05, 1.02, 1.00, 1.18])
+WEEKEND_PREMIUM = 1.12
+
+ADJECTIVES = np.array(["Sunny", "Cozy", "Spacious", "Charming", "Modern", "Quiet", "Bright", "Classic"])
+PLACES = np.array(["studio", "loft", "apartment", "room", "suite", "brownstone floor"])
+
+def format_prices(values):
+    """Whole-dollar prices as Inside Airbnb text ("$1,234.00"); NaN -> empty."""
+    out = np.full(len(values), "", dtype=object)
+    present = ~np.isnan(values)
+    unique, inverse = np.unique(values[present], return_inverse=True)
+    out[present] = np.array([f"${v:,.2f}" for v in unique], dtype=object)[inverse]
+    return out
+
+def _listing_chunk(rng, ids):
+    n = len(ids)
+    hood = rng.choice(len(NEIGHBOURHOODS), n, p=_weights())
+    names, boroughs, lat0, lon0, _, level = (np.array(col, dtype=object) for col in zip(*NEIGHBOURHOODS))
+    names, boroughs = names[hood], boroughs[hood]
+    level = level[hood].astype(np.float64)
+
+    room_names = list(ROOM_TYPES)
+    room = rng.choice(len(room_names), n, p=[ROOM_TYPES[r][0] for r in room_names])
+    median = np.array([ROOM_TYPES[r][1] for r in room_names])[room]
+    capacity = np.array([ROOM_TYPES[r][3] for r in room_names])[room]
+    property_type = np.empty(n, dtype=object)
+    for i, r in enumerate(room_names):
+        rows = room == i
+        property_type[rows] = rng.choice(ROOM_TYPES[r][2], rows.sum())
+
+    accommodates = np.clip(1 + rng.poisson(capacity - 1), 1, 16)
+    price = np.round(median * level * (1 + 0.12 * (accommodates - 2).clip(0)) * rng.lognormal(0, PRICE_SIGMA, n))
+    price = price.clip(10)
+    draw = rng.random(n)
+    price[draw < PRICE_OUTLIER_SHARE] = rng.choice([5000.0, 9999.0, 10000.0, 20000.0], (draw < PRICE_OUTLIER_SHARE).sum())
+    price[(draw >= PRICE_OUTLIER_SHARE) & (draw < PRICE_OUTLIER_SHARE + PRICE_ZERO_SHARE)] = 0.0
+    price[rng.random(n) < PRICE_NULL_SHARE] = np.nan
+
+    # NYC's short-term rental rule: many listings require 30+ nights
+    minimum_nights = np.where(rng.random(n) < 0.45, 30, rng.choice([1, 2, 3, 4, 5, 7, 14], n))
+    minimum_nights[rng.random(n) < 0.01] = 365
+    reviews = rng.negative_binomial(0.5, 0.5 / (0.5 + 40), n)
+    months_active = rng.uniform(1, 120, n)
+    has_reviews = reviews > 0
+    reviews_per_month = np.where(has_reviews, np.round(reviews / months_active, 2).clip(0.01), np.nan)
+    rating = np.where(has_reviews, np.round(np.clip(5 - rng.gamma(1.2, 0.15, n), 1, 5), 2), np.nan)
+
+    lat = lat0[hood].astype(np.float64) + rng.normal(0, 0.008, n)
+    lon = lon0[hood].astype(np.float64) + rng.normal(0, 0.010, n)
+    title = rng.choice(ADJECTIVES, n).astype(object) + " " + rng.choice(PLACES, n).astype(object) + " in " + names
+    # Free text with quotes, commas and line breaks, as in the real export
+    description = np.where(
+        rng.random(n) < 0.3,
+        "Steps from the subway, \"quiet\" block.\nWasher/dryer, fast Wi-Fi.",
+        "Bright, airy space close to restaurants and parks.",
+    )
+
+    frame = pd.DataFrame({
+        "id": ids,
+        "name": title,
+        "description": description,
+        "host_id": rng.integers(1000, 600_000_000, n),
+        "neighbourhood_cleansed": names,
+        "neighbourhood_group_cleansed": boroughs,
+        "latitude": np.round(lat, 6),
+        "longitude": np.round(lon, 6),
+        "property_type": property_type,
+        "room_type": np.array(room_names, dtype=object)[room],
+        "accommodates": accommodates,
+        "price": format_prices(price),
+        "minimum_nights": minimum_nights,
+        "maximum_nights": rng.choice([30, 365, 1125], n),
+        "number_of_reviews": reviews,
+        "review_scores_rating": rating,
+        "reviews_per_month": reviews_per_month,
+        "availability_365": rng.integers(0, 366, n),
+    })
+    return frame, price
+
+def _calendar_chunk(rng, listings, base_price, dates):
+    n, days = len(listings), len(dates)
+    month = dates.month.to_numpy() - 1
+    weekend = np.where(dates.dayofweek.isin([4, 5]), WEEKEND_PREMIUM, 1.0)
+    day_factor = SEASON[month] * weekend
+
+    open_share = rng.beta(0.8, 0.8, n)  # many listings are mostly booked or mostly blocked
+    available = rng.random((n, days)) < open_share[:, None]
+    price = np.round(base_price[:, None] * day_factor[None, :] * rng.normal(1, 0.05, (n, days)))
+    return pd.DataFrame({
+        "listing_id": np.repeat(listings["id"].to_numpy(), days),
+        "date": np.tile(dates.strftime("%Y-%m-%d").to_numpy(), n),
+        "available": np.where(available.ravel(), "t", "f"),
+        "price": format_prices(price.ravel()),
+        "adjusted_price": "",
+        "minimum_nights": np.repeat(listings["minimum_nights"].to_numpy(), days),
+        "maximum_nights": np.repeat(listings["maximum_nights"].to_numpy(), days),
+    })
+
+def _weights():
+    weights = np.array([row[4] for row in NEIGHBOURHOODS])
+    return weights / weights.sum()
+
+def generate(scale=1.0, out_dir=".", seed=42, days=CALENDAR_DAYS):
+    """
+    Writes listings_nyc.csv and calendar_nyc.csv (plus generator.json with the
+    parameters and row counts) to out_dir. Returns the generator.json contents.
+    """
+    n_listings = max(1, int(round(NYC_LISTINGS * scale)))
+    os.makedirs(out_dir, exist_ok=True)
+    listings_path = os.path.join(out_dir, "listings_nyc.csv")
+    calendar_path = os.path.join(out_dir, "calendar_nyc.csv")
+    dates = pd.date_range(CALENDAR_START, periods=days, freq="D")
+
+    print(f"🧪 Generating {n_listings:,} listings x {days} calendar days (scale {scale:g}, seed {seed})...")
+    start = time.perf_counter()
+    root = np.random.default_rng(seed)
+    # Real ids are sparse and increasing
+    ids = 2539 + np.cumsum(root.integers(1, 1000, n_listings))
+    bounds = range(0, n_listings, LISTINGS_CHUNK)
+    seeds = np.random.SeedSequence(seed).spawn(2 * len(bounds))
+
+    calendar_rows = 0
+    for i, begin in enumerate(bounds):
+        listings, base_price = _listing_chunk(np.random.default_rng(seeds[2 * i]), ids[begin:begin + LISTINGS_CHUNK])
+        listings.to_csv(listings_path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+
+        rng = np.random.default_rng(seeds[2 * i + 1])
+        for j in range(0, len(listings), CALENDAR_CHUNK):
+            calendar = _calendar_chunk(rng, listings.iloc[j:j + CALENDAR_CHUNK],
+                                       base_price[j:j + CALENDAR_CHUNK], dates)
+            calendar.to_csv(calendar_path, mode="w" if calendar_rows == 0 else "a",
+                            header=calendar_rows == 0, index=False)
+            calendar_rows += len(calendar)
+        print(f"   Generated {min(begin + LISTINGS_CHUNK, n_listings):,} listings...", end="\r")
+
+    manifest = {
+        "scale": scale,
+        "seed": seed,
+        "days": days,
+        "listings": n_listings,
+        "calendar_rows": calendar_rows,
+        "bytes": os.path.getsize(listings_path) + os.path.getsize(calendar_path),
+    }
+    with open(os.path.join(out_dir, "generator.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"\n✅ Wrote {n_listings:,} listings and {calendar_rows:,} calendar rows "
+          f"({manifest['bytes'] / (1024 * 1024):,.1f} MB) to '{out_dir}' in {time.perf_counter() - start:.1f}s.")
+    return manifest
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic Inside Airbnb NYC snapshot.")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiple of NYC's size (1 = ~37.5k listings)")
+    parser.add_argument("--out", default=".", help="output directory")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--days", type=int, default=CALENDAR_DAYS, help="calendar days per listing")
+    args = parser.parse_args()
+    generate(scale=args.scale, out_dir=args.out, seed=args.seed, days=args.days)
@@ -1,6 +1,7 @@
-import psycopg2
-from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+import sys
+from sqlalchemy import text
 import config
+import db
 
 def init_db():
     """
@@ -9,35 +10,28 @@ def init_db():
     """
     print("🚀 Initializing Database Environment...")
     
-    # Connect to 'postgres' system database
+    # Connect to 'postgres' system database (CREATE DATABASE can't run in a transaction)
     try:
-        con = psycopg2.connect(
-            user=config.DB_USER,
-            password=config.DB_PASSWORD,
-            host=config.DB_HOST,
-            port=config.DB_PORT,
-            dbname='postgres'
-        )
-        con.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
-        cursor = con.cursor()
-        
-        # Check if DB exists
-        cursor.execute(f"SELECT 1 FROM pg_catalog.pg_database WHERE datname = '{config.DB_NAME}'")
-        exists = cursor.fetchone()
-        
-        if not exists:
-            print(f"🛠 Creating database '{config.DB_NAME}'...")
-            cursor.execute(f"CREATE DATABASE {config.DB_NAME}")
-            print(f"✅ Database '{config.DB_NAME}' created successfully.")
-        else:
-            print(f"ℹ️ Database '{config.DB_NAME}' already exists.")
-            
-        cursor.close()
-        con.close()
-        
+        engine = db.get_engine('postgres', pool_size=1, max_overflow=0)
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            # Check if DB exists
+            exists = conn.execute(text("SELECT 1 FROM pg_catalog.pg_database WHERE datname = :name"),
+                                  {'name': config.DB_NAME}).scalar()
+
+            if not exists:
+                print(f"🛠 Creating database '{config.DB_NAME}'...")
+                # Identifiers can't be bound parameters; quote it instead
+                name = engine.dialect.identifier_preparer.quote(config.DB_NAME)
+                conn.execute(text(f"CREATE DATABASE {name}"))
+                print(f"✅ Database '{config.DB_NAME}' created successfully.")
+            else:
+                print(f"ℹ️ Database '{config.DB_NAME}' already exists.")
+        return True
+
     except Exception as e:
         print(f"❌ Database Initialization Failed: {e}")
         print("Suggestion: fast-check your DB_PASSWORD in config.py")
+        return False
 
 if __name__ == "__main__":
-    init_db()
+    sys.exit(0 if init_db() else 1)
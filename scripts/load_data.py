@@ -1,55 +1,601 @@
+import argparse
+import hashlib
+import io
+import re
+import sys
+import time
+from datetime import date
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import pandas as pd
-from sqlalchemy import create_engine
+from sqlalchemy import inspect, text
 import os
 import config
+import db
+import telemetry
 
-def load_data():
+# Chunking Strategy for Memory Management
+CHUNKSIZE = 100000
+
+# Inside Airbnb ships every calendar field as text. These columns are stored
+# typed instead, so downstream queries never re-parse them.
+TYPED_COLUMNS = {
+    "raw_calendar_nyc": {"date": "DATE", "available": "BOOLEAN"},
+}
+
+# Computed by PostgreSQL as rows arrive (COPY and INSERT alike)
+GENERATED_COLUMNS = {
+    "raw_calendar_nyc": {
+        "price_num": "NUMERIC GENERATED ALWAYS AS "
+                     "(CAST(NULLIF(regexp_replace(price::TEXT, '[^0-9.]', '', 'g'), '') AS NUMERIC)) STORED",
+    },
+}
+
+# Built once the data is in (cheaper than maintaining them during the bulk load).
+# BRIN suits the calendar's date-ordered heap; the partial index covers
+# "available" lookups per listing and lets monthly seasonality run index-only.
+INDEXES = {
+    "raw_calendar_nyc": [
+        'CREATE INDEX IF NOT EXISTS "{table}_date_brin" ON "{table}" USING brin (date)',
+        'CREATE INDEX IF NOT EXISTS "{table}_available_idx" ON "{table}" (listing_id, date) '
+        'INCLUDE (price_num) WHERE available',
+    ],
+}
+
+# Stored as declaratively partitioned tables: one range partition per month of
+# this column (plus a DEFAULT partition for NULL dates). Date filters prune
+# partitions, and old snapshots are dropped with detach_partitions_before().
+PARTITION_COLUMNS = {
+    "raw_calendar_nyc": "date",
+}
+
+def _create_table(table_name, sample, engine, schema_for=None, generated=True):
+    """
+    Creates (or replaces) an empty table whose schema is inferred from
+    the first chunk, so every later chunk can be appended as-is.
+    Typed/generated columns are taken from the raw table `schema_for`
+    (defaults to table_name). Runs in a single transaction, so the table
+    appears atomically.
+    """
+    schema_for = schema_for or table_name
+    partition_col = PARTITION_COLUMNS.get(table_name)
+    template = f"{table_name}__template" if partition_col else table_name
+    with engine.begin() as conn:
+        sample.head(0).to_sql(template, conn, if_exists='replace', index=False)
+
+        types = {c: t for c, t in TYPED_COLUMNS.get(schema_for, {}).items() if c in sample.columns}
+        if types:
+            alters = ", ".join(f'ALTER COLUMN "{c}" TYPE {t} USING "{c}"::TEXT::{t}' for c, t in types.items())
+            conn.execute(text(f'ALTER TABLE "{template}" {alters}'))
+        if partition_col:
+            _create_partitioned(conn, table_name, template, partition_col)
+            conn.execute(text(f'DROP TABLE "{template}"'))
+        if generated:
+            for col, definition in GENERATED_COLUMNS.get(schema_for, {}).items():
+                conn.execute(text(f'ALTER TABLE "{table_name}" ADD COLUMN "{col}" {definition}'))
+
+def _create_partitioned(conn, table_name, like_table, partition_col):
+    """Creates table_name as an (empty) month-partitioned copy of like_table's columns."""
+    conn.execute(text(f'DROP TABLE IF EXISTS "{table_name}" CASCADE'))
+    conn.execute(text(f'CREATE TABLE "{table_name}" (LIKE "{like_table}") PARTITION BY RANGE ("{partition_col}")'))
+    conn.execute(text(f'CREATE TABLE "{table_name}_default" PARTITION OF "{table_name}" DEFAULT'))
+
+def _partition_name(table_name, month):
+    return f"{table_name}_p{month.year:04d}_{month.month:02d}"
+
+def _ensure_partitions(conn, table_name, months):
+    """Creates the monthly partitions (anything with .year/.month) that don't exist yet."""
+    for month in sorted({(m.year, m.month) for m in months}):
+        start = date(month[0], month[1], 1)
+        end = date(month[0] + month[1] // 12, month[1] % 12 + 1, 1)
+        conn.execute(text(
+            f'CREATE TABLE IF NOT EXISTS "{_partition_name(table_name, start)}" '
+            f'PARTITION OF "{table_name}" FOR VALUES FROM (\'{start}\') TO (\'{end}\')'
+        ))
+
+def _scan_months(source, column, read_kwargs=None):
+    """Distinct months found in one date column of a CSV (reads only that column)."""
+    months = set()
+    for chunk in pd.read_csv(source, usecols=[column], chunksize=CHUNKSIZE * 10, **(read_kwargs or {})):
+        parsed = pd.to_datetime(chunk[column], errors='coerce').dropna()
+        months.update(parsed.dt.to_period('M').unique())
+    return months
+
+def _prepare_partitions(file_path, table_name, engine):
+    """Pre-creates every month partition the file needs before rows are loaded."""
+    partition_col = PARTITION_COLUMNS.get(table_name)
+    if not partition_col:
+        return
+    months = _scan_months(file_path, partition_col)
+    with engine.begin() as conn:
+        _ensure_partitions(conn, table_name, months)
+    print(f"   Prepared {len(months)} monthly partitions for '{table_name}'.")
+
+def detach_partitions_before(table_name, before, drop=True):
+    """
+    Detaches every monthly partition of table_name that ends on or before
+    `before` ('YYYY-MM'), and drops it unless drop=False. This removes an old
+    snapshot's months without deleting rows one by one.
+    """
+    cutoff = tuple(int(part) for part in before.split('-'))
+    pattern = re.compile(rf"^{re.escape(table_name)}_p(\d{{4}})_(\d{{2}})$")
+    engine = db.get_engine()
+    with engine.begin() as conn:
+        partitions = conn.execute(text("""
+            SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(:t)
+        """), {'t': table_name}).scalars().all()
+        for name in sorted(partitions):
+            match = pattern.match(name)
+            if not match or (int(match.group(1)), int(match.group(2))) >= cutoff:
+                continue
+            conn.execute(text(f'ALTER TABLE "{table_name}" DETACH PARTITION "{name}"'))
+            if drop:
+                conn.execute(text(f'DROP TABLE "{name}"'))
+            print(f"   {'Dropped' if drop else 'Detached'} partition {name}.")
+
+def _finalize_table(engine, table_name):
+    """Builds the table's indexes and refreshes planner statistics after a load."""
+    with engine.begin() as conn:
+        for ddl in INDEXES.get(table_name, []):
+            conn.execute(text(ddl.format(table=table_name)))
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f'VACUUM (ANALYZE) "{table_name}"'))
+
+def _int_columns(sample):
+    return [c for c in sample.columns if sample[c].dtype.kind in 'iu']
+
+def _align_dtypes(chunk, int_columns):
+    """
+    Keeps integer columns integer across chunks.
+    A chunk with a missing value turns an int column into float ('3.0'),
+    which COPY rejects for a BIGINT column, so we use the nullable Int64 instead.
+    """
+    for col in int_columns:
+        if col in chunk.columns and chunk[col].dtype.kind == 'f':
+            try:
+                chunk[col] = chunk[col].astype('Int64')
+            except (TypeError, ValueError):
+                pass
+    return chunk
+
+def _copy_chunk(chunk, table_name, cursor):
+    """Streams one chunk into PostgreSQL via COPY FROM STDIN (no per-row INSERTs)."""
+    buffer = io.StringIO()
+    chunk.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    columns = ", ".join(f'"{c}"' for c in chunk.columns)
+    cursor.copy_expert(f'COPY "{table_name}" ({columns}) FROM STDIN WITH (FORMAT csv)', buffer)
+
+def _copy_chunks(chunks, table_name, engine, int_columns, on_progress=None):
+    """COPYs an iterator of chunks into an existing table in one transaction."""
+    rows = 0
+    raw_conn = engine.raw_connection()
+    try:
+        cursor = raw_conn.cursor()
+        for chunk in chunks:
+            _copy_chunk(_align_dtypes(chunk, int_columns), table_name, cursor)
+            rows += len(chunk)
+            if on_progress:
+                on_progress(rows)
+        raw_conn.commit()
+        cursor.close()
+    except Exception:
+        raw_conn.rollback()
+        raise
+    finally:
+        raw_conn.close()
+    return rows
+
+def _load_file_copy(file_path, table_name, engine, schema_for=None, generated=True):
+    """Loads one CSV with COPY. Returns the number of rows written."""
+    reader = pd.read_csv(file_path, chunksize=CHUNKSIZE, low_memory=False)
+    first = next(reader, None)
+    if first is None:
+        return 0
+    _create_table(table_name, first, engine, schema_for=schema_for, generated=generated)
+    _prepare_partitions(file_path, table_name, engine)
+
+    def chunks():
+        yield first
+        yield from reader
+
+    return _copy_chunks(chunks(), table_name, engine, _int_columns(first),
+                        on_progress=lambda n: print(f"   Copied {n} rows...", end='\r'))
+
+def _load_file_insert(file_path, table_name, engine):
+    """Loads one CSV with multi-row INSERTs (original path, kept for comparison)."""
+    rows = 0
+    for i, chunk in enumerate(pd.read_csv(file_path, chunksize=CHUNKSIZE, low_memory=False)):
+        # Create the (typed) table from the first chunk, then append every chunk
+        if i == 0:
+            _create_table(table_name, chunk, engine)
+            _prepare_partitions(file_path, table_name, engine)
+        chunk.to_sql(table_name, engine, if_exists='append', index=False, method='multi')
+        rows += len(chunk)
+        print(f"   Processed {rows} rows...", end='\r')
+    return rows
+
+# --- Load Manifest & Incremental Re-ingestion ------------------------------
+
+MANIFEST_SQL = """
+CREATE TABLE IF NOT EXISTS load_manifest (
+    load_id SERIAL PRIMARY KEY,
+    file_name TEXT NOT NULL,
+    table_name TEXT NOT NULL,
+    checksum TEXT,
+    method TEXT,
+    row_count BIGINT,
+    rows_upserted BIGINT,
+    rows_deleted BIGINT,
+    loaded_at TIMESTAMPTZ DEFAULT now()
+)
+"""
+
+def _file_checksum(file_path, block_size=8 * 1024 * 1024):
+    """SHA-256 of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _record_load(conn, file_path, table_name, method, checksum, rows, upserted=None, deleted=None):
+    """Appends one row to load_manifest and returns its load_id."""
+    conn.execute(text(MANIFEST_SQL))
+    return conn.execute(text("""
+        INSERT INTO load_manifest (file_name, table_name, checksum, method, row_count, rows_upserted, rows_deleted)
+        VALUES (:file_name, :table_name, :checksum, :method, :row_count, :upserted, :deleted)
+        RETURNING load_id
+    """), {
+        'file_name': os.path.basename(file_path), 'table_name': table_name, 'checksum': checksum,
+        'method': method, 'row_count': rows, 'upserted': upserted, 'deleted': deleted,
+    }).scalar()
+
+def _last_checksum(engine, table_name):
+    """Checksum of the most recent load into table_name (None if never loaded)."""
+    with engine.begin() as conn:
+        conn.execute(text(MANIFEST_SQL))
+        return conn.execute(text("""
+            SELECT checksum FROM load_manifest
+            WHERE table_name = :table_name
+            ORDER BY load_id DESC LIMIT 1
+        """), {'table_name': table_name}).scalar()
+
+def _quote(columns):
+    return ", ".join(f'"{c}"' for c in columns)
+
+def _prepare_target(conn, table_name, staging, columns, keys):
+    """
+    Makes sure the target table matches the staging schema and carries the
+    _row_hash / _load_id bookkeeping columns plus a unique index on its keys.
+    A target created by a full load (or with a different column set) is rebuilt.
+    """
+    generated = GENERATED_COLUMNS.get(table_name, {})
+    insp = inspect(conn)
+    if insp.has_table(table_name):
+        existing = [c['name'] for c in insp.get_columns(table_name)]
+        if existing == columns + list(generated) + ['_row_hash', '_load_id']:
+            return
+        print(f"   Schema of '{table_name}' differs from the snapshot; rebuilding it.")
+        conn.execute(text(f'DROP TABLE "{table_name}" CASCADE'))
+
+    partition_col = PARTITION_COLUMNS.get(table_name)
+    if partition_col:
+        _create_partitioned(conn, table_name, staging, partition_col)
+    else:
+        conn.execute(text(f'CREATE TABLE "{table_name}" (LIKE "{staging}")'))
+    for col, definition in generated.items():
+        conn.execute(text(f'ALTER TABLE "{table_name}" ADD COLUMN "{col}" {definition}'))
+    conn.execute(text(f'ALTER TABLE "{table_name}" ADD COLUMN _row_hash TEXT, ADD COLUMN _load_id INTEGER'))
+    conn.execute(text(f'CREATE UNIQUE INDEX "{table_name}_key_idx" ON "{table_name}" ({_quote(keys)})'))
+
+def _load_file_incremental(file_path, table_name, engine):
+    """
+    Stages a snapshot and upserts only new or changed rows into table_name.
+    Rows are compared by an md5 of their content; rows missing from the
+    snapshot are deleted. An unchanged file (same checksum) is a no-op.
+    """
+    keys = config.TABLE_KEYS.get(table_name)
+    if not keys:
+        raise ValueError(f"No natural key configured for '{table_name}' in config.TABLE_KEYS")
+
+    checksum = _file_checksum(file_path)
+    if checksum == _last_checksum(engine, table_name) and inspect(engine).has_table(table_name):
+        print(f"   {os.path.basename(file_path)} unchanged since the last load (sha256 {checksum[:12]}). Nothing to do.")
+        return 0
+
+    # 1. Stage the snapshot with COPY
+    staging = f"stg_{table_name}"
+    rows = _load_file_copy(file_path, staging, engine, schema_for=table_name, generated=False)
+    print()
+
+    # 2. Merge into the target in one transaction
+    with engine.begin() as conn:
+        columns = [c['name'] for c in inspect(conn).get_columns(staging)]
+        _prepare_target(conn, table_name, staging, columns, keys)
+        load_id = _record_load(conn, file_path, table_name, 'incremental', checksum, rows)
+        partition_col = PARTITION_COLUMNS.get(table_name)
+        if partition_col:
+            months = conn.execute(text(
+                f'SELECT DISTINCT date_trunc(\'month\', "{partition_col}")::DATE FROM "{staging}" '
+                f'WHERE "{partition_col}" IS NOT NULL'
+            )).scalars().all()
+            _ensure_partitions(conn, table_name, months)
+
+        updates = ", ".join(f'"{c}" = EXCLUDED."{c}"' for c in columns if c not in keys)
+        upserted = conn.execute(text(f"""
+            INSERT INTO "{table_name}" ({_quote(columns)}, _row_hash, _load_id)
+            SELECT DISTINCT ON ({_quote(keys)}) {_quote(columns)}, md5(s::TEXT), :load_id
+            FROM "{staging}" s
+            ON CONFLICT ({_quote(keys)}) DO UPDATE
+            SET {updates}, _row_hash = EXCLUDED._row_hash, _load_id = EXCLUDED._load_id
+            WHERE "{table_name}"._row_hash IS DISTINCT FROM EXCLUDED._row_hash
+        """), {'load_id': load_id}).rowcount
+
+        key_match = " AND ".join(f's."{k}" = t."{k}"' for k in keys)
+        deleted = conn.execute(text(f"""
+            DELETE FROM "{table_name}" t
+            WHERE NOT EXISTS (SELECT 1 FROM "{staging}" s WHERE {key_match})
+        """)).rowcount
+
+        conn.execute(text("""
+            UPDATE load_manifest SET rows_upserted = :upserted, rows_deleted = :deleted
+            WHERE load_id = :load_id
+        """), {'upserted': upserted, 'deleted': deleted, 'load_id': load_id})
+        conn.execute(text(f'DROP TABLE "{staging}"'))
+
+    print(f"   Upserted {upserted} new/changed rows, deleted {deleted} removed rows.")
+    return rows
+
+LOADERS = {
+    'copy': _load_file_copy,
+    'insert': _load_file_insert,
+    'incremental': _load_file_incremental,
+}
+
+# --- Parallel Ingestion ---------------------------------------------------
+
+class _ByteRange(io.RawIOBase):
+    """Read-only view of bytes [start, end) of a file."""
+
+    def __init__(self, path, start, end):
+        self._f = open(path, 'rb')
+        self._f.seek(start)
+        self._remaining = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        if self._remaining <= 0:
+            return 0
+        n = self._f.readinto(memoryview(b)[:min(len(b), self._remaining)])
+        self._remaining -= n
+        return n
+
+    def close(self):
+        self._f.close()
+        super().close()
+
+def _shard_offsets(file_path, shard_bytes):
+    """
+    Splits a CSV into (start, end) byte ranges that begin and end on line boundaries.
+    The header line is excluded from every shard.
+    """
+    size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as f:
+        f.readline()
+        start = f.tell()
+        offsets = []
+        while start < size:
+            f.seek(min(start + shard_bytes, size))
+            f.readline()  # advance to the next line boundary
+            end = min(f.tell(), size)
+            offsets.append((start, end))
+            start = end
+    return offsets
+
+def _get_worker_engine():
+    # One single-connection engine per worker process (db caches it per pid), reused across tasks
+    return db.get_engine(pool_size=1, max_overflow=0)
+
+def _shard_source(file_path, start, end, columns):
+    """Returns (source, read_csv kwargs) for a whole file (start=None) or a byte range."""
+    if start is None:
+        return file_path, {}
+    source = io.TextIOWrapper(io.BufferedReader(_ByteRange(file_path, start, end)), encoding='utf-8')
+    return source, {'header': None, 'names': columns}
+
+def _scan_shard_months(file_path, table_name, start, end, columns, str_columns, int_columns):
+    """Worker task: distinct months of the partition column in one shard."""
+    source, read_kwargs = _shard_source(file_path, start, end, columns)
+    return table_name, _scan_months(source, PARTITION_COLUMNS[table_name], read_kwargs)
+
+def _load_shard(file_path, table_name, start, end, columns, str_columns, int_columns):
+    """Worker task: COPYs one byte range (or a whole file) into an existing table."""
+    t0 = time.perf_counter()
+    source, read_kwargs = _shard_source(file_path, start, end, columns)
+    reader = pd.read_csv(source, chunksize=CHUNKSIZE, low_memory=False,
+                         dtype={c: str for c in str_columns}, **read_kwargs)
+    rows = _copy_chunks(reader, table_name, _get_worker_engine(), int_columns)
+    return table_name, rows, time.perf_counter() - t0
+
+def _plan_tasks(file_path, filename, table_name, engine):
+    """Creates the target table once and returns the worker tasks for one file."""
+    sample = pd.read_csv(file_path, nrows=CHUNKSIZE, low_memory=False)
+    _create_table(table_name, sample, engine)
+
+    columns = list(sample.columns)
+    str_columns = [c for c in columns if sample[c].dtype == object]
+    int_columns = _int_columns(sample)
+
+    if filename in config.SHARDABLE_FILES:
+        ranges = _shard_offsets(file_path, config.SHARD_SIZE_MB * 1024 * 1024)
+    else:
+        ranges = [(None, None)]
+    return [(file_path, table_name, start, end, columns, str_columns, int_columns)
+            for start, end in ranges]
+
+def _load_parallel(engine, workers):
+    """
+    Fans every file (or byte-range shard) out to a process pool.
+    Returns the rows loaded and whether every file loaded completely.
+    """
+    tasks = []
+    sources = {}
+    ok = True
+    for filename, table_name in config.FILES.items():
+        file_path = os.path.join(config.DATA_DIR, filename)
+        if not os.path.exists(file_path):
+            print(f"⚠️ Warning: {filename} not found. Skipping.")
+            continue
+        try:
+            file_tasks = _plan_tasks(file_path, filename, table_name, engine)
+        except Exception as e:
+            print(f"❌ Error preparing {filename}: {e}")
+            ok = False
+            continue
+        print(f"📥 Loading {filename} into '{table_name}' ({len(file_tasks)} shard(s))...")
+        tasks.extend(file_tasks)
+        sources[table_name] = file_path
+
+    if not tasks:
+        return 0, ok
+
+    totals = {}
+    failed = {}  # table -> shards that failed; such a table is left unrecorded
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Partitions must exist before any worker COPYs into them: scan the
+        # shards for their months first, then create the partitions once here.
+        scan_futures = [pool.submit(_scan_shard_months, *task) for task in tasks if task[1] in PARTITION_COLUMNS]
+        months = {}
+        for future in scan_futures:
+            table_name, found = future.result()
+            months.setdefault(table_name, set()).update(found)
+        for table_name, found in months.items():
+            with engine.begin() as conn:
+                _ensure_partitions(conn, table_name, found)
+            print(f"   Prepared {len(found)} monthly partitions for '{table_name}'.")
+
+        futures = {pool.submit(_load_shard, *task): task for task in tasks}
+        for done, future in enumerate(as_completed(futures), 1):
+            table_name = futures[future][1]
+            try:
+                _, rows, _ = future.result()
+            except Exception as e:
+                print(f"\n❌ Error loading shard of '{table_name}': {e}")
+                failed[table_name] = failed.get(table_name, 0) + 1
+                continue
+            totals[table_name] = totals.get(table_name, 0) + rows
+            loaded = sum(totals.values())
+            print(f"   [{done}/{len(tasks)} shards] {loaded} rows loaded...", end='\r')
+
+    elapsed = time.perf_counter() - start
+    print()
+    for table_name in sources:
+        rows = totals.get(table_name, 0)
+        if table_name in failed:
+            # Partly loaded: recorded without a checksum (and not finalized), so
+            # no later run, incremental included, takes the file as already loaded
+            with engine.begin() as conn:
+                _record_load(conn, sources[table_name], table_name, 'copy (incomplete)', None, rows)
+            print(f"❌ {table_name} is incomplete ({failed[table_name]} shard(s) failed, {rows} rows loaded). "
+                  f"Rerun the load.")
+            continue
+        with engine.begin() as conn:
+            file_path = sources[table_name]
+            _record_load(conn, file_path, table_name, 'copy', _file_checksum(file_path), rows)
+        _finalize_table(engine, table_name)
+        print(f"✅ Finished loading {table_name}: {rows} rows.")
+    total_rows = sum(totals.values())
+    rate = total_rows / elapsed if elapsed > 0 else 0
+    print(f"⏱ {total_rows} rows in {elapsed:.1f}s with {workers} workers ({rate:,.0f} rows/sec).")
+    return total_rows, ok and not failed
+
+@telemetry.traced("load_data")
+def load_data(method='copy', workers=1):
     """
     Orchestrates the EL (Extract-Load) process.
     Reads raw CSVs in chunks and writes to PostgreSQL.
+
+    method: 'copy' streams each chunk through COPY FROM STDIN (default),
+            'insert' uses the original chunked to_sql(method='multi') path,
+            'incremental' stages the snapshot and upserts only changed rows.
+    workers: >1 loads files (and byte-range shards of SHARDABLE_FILES) in
+             parallel worker processes, each with its own connection ('copy' only).
+    Returns False if the load failed or any file did not load completely.
     """
     print("🚀 Starting Data Ingestion...")
-    
+
+    if method not in LOADERS:
+        print(f"❌ Unknown load method '{method}'. Choose one of: {', '.join(LOADERS)}")
+        return False
+    loader = LOADERS[method]
+
     # Establish Connection
     try:
-        engine = create_engine(config.DATABASE_URL)
+        engine = db.get_engine()
         connection = engine.connect()
         print(f"✅ Connected to PostgreSQL database: {config.DB_NAME}")
         connection.close()
     except Exception as e:
         print(f"❌ Failed to connect to DB. Ensure PostgreSQL is running and credentials in config.py are correct.\nError: {e}")
-        return
+        return False
+
+    if workers > 1:
+        if method != 'copy':
+            print("⚠️ Parallel ingestion only supports the 'copy' method. Using 'copy'.")
+            method = 'copy'
+        with telemetry.stage("load.parallel", workers=workers) as record:
+            record['rows'], ok = _load_parallel(engine, workers)
+        print("🏁 Ingestion Complete." if ok else "❌ Ingestion finished with errors.")
+        return ok
 
     # Ingestion Loop
+    ok = True
     for filename, table_name in config.FILES.items():
         file_path = os.path.join(config.DATA_DIR, filename)
-        
+
         if not os.path.exists(file_path):
             print(f"⚠️ Warning: {filename} not found. Skipping.")
             continue
 
-        print(f"📥 Loading {filename} into '{table_name}'...")
-        
-        # Chunking Strategy for Memory Management
-        chunksize = 100000
-        count = 0
-        
+        print(f"📥 Loading {filename} into '{table_name}' ({method})...")
+
         try:
-            for chunk in pd.read_csv(file_path, chunksize=chunksize, low_memory=False):
-                # 'replace' for the first chunk, 'append' for subsequent chunks
-                if_exists = 'replace' if count == 0 else 'append'
-                
-                chunk.to_sql(table_name, engine, if_exists=if_exists, index=False, method='multi')
-                
-                count += 1
-                print(f"   Processed {count * chunksize} rows...", end='\r')
-            
-            print(f"\n✅ Finished loading {table_name} ({count} chunks).")
-            
+            with telemetry.stage(f"load.{table_name}", method=method) as record:
+                start = time.perf_counter()
+                rows = loader(file_path, table_name, engine)
+                if rows:
+                    _finalize_table(engine, table_name)
+                elapsed = time.perf_counter() - start
+                if method != 'incremental':
+                    with engine.begin() as conn:
+                        _record_load(conn, file_path, table_name, method, _file_checksum(file_path), rows)
+                record['rows'] = rows
+            rate = rows / elapsed if elapsed > 0 else 0
+            print(f"\n✅ Finished loading {table_name}: {rows} rows in {elapsed:.1f}s ({rate:,.0f} rows/sec).")
+
         except Exception as e:
             print(f"\n❌ Error loading {filename}: {e}")
+            ok = False
 
-    print("🏁 Ingestion Complete.")
+    print("🏁 Ingestion Complete." if ok else "❌ Ingestion finished with errors.")
+    return ok
 
 if __name__ == "__main__":
-    load_data()
+    parser = argparse.ArgumentParser(description="Load raw Inside Airbnb CSVs into PostgreSQL.")
+    parser.add_argument("--method", choices=sorted(LOADERS), default='copy',
+                        help="'copy' (COPY FROM STDIN), 'insert' (chunked multi-row INSERT) "
+                             "or 'incremental' (upsert changed rows only)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help=f"parallel worker processes (e.g. {config.LOAD_WORKERS} for all cores)")
+    parser.add_argument("--detach-before", metavar="YYYY-MM",
+                        help="drop calendar partitions for months before YYYY-MM instead of loading")
+    args = parser.parse_args()
+    if args.detach_before:
+        for table_name in PARTITION_COLUMNS:
+            detach_partitions_before(table_name, args.detach_before)
+    else:
+        sys.exit(0 if load_data(method=args.method, workers=args.workers) else 1)
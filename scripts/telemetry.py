@@ -0,0 +1,236 @@
+"""
+telemetry.py
+
+Purpose:
+Run telemetry for the pipeline: every stage and every SQL statement is timed
+and appended as one JSON line to a per-run trace file, so runs can be compared
+from one snapshot to the next.
+
+- stage(name) / @traced(name): wall time, CPU time (this process and its
+  finished worker processes), peak RSS, row count and status of a block.
+- execute(conn, stmt, params): runs a SQL statement, records its wall time
+  and row count. With TELEMETRY_EXPLAIN=1, explainable statements run under
+  EXPLAIN (ANALYZE, BUFFERS) instead (they still execute once), and the plan
+  is kept for the ones slower than TELEMETRY_SLOW_SECONDS.
+- register_counters(func): running totals (e.g. db.connection_metrics) whose
+  change over each stage is added to its event.
+
+Traces go to TRACE_DIR/<run id>.jsonl. Processes started by a run share its
+id through the PIPELINE_RUN_ID environment variable.
+
+Usage:
+    python telemetry.py            # summary of the latest run
+    python telemetry.py compare    # latest run vs the one before, per stage
+"""
+
+import functools
+import json
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+TRACE_DIR = os.getenv("TRACE_DIR", "traces")
+EXPLAIN_SLOW = os.getenv("TELEMETRY_EXPLAIN", "0") == "1"
+SLOW_SECONDS = float(os.getenv("TELEMETRY_SLOW_SECONDS", "1.0"))
+
+RUN_ID = os.environ.setdefault("PIPELINE_RUN_ID", datetime.now().strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}")
+
+# Statements EXPLAIN can run (and ANALYZE executes for real)
+EXPLAINABLE = re.compile(
+    r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH|CREATE\s+(TABLE|MATERIALIZED\s+VIEW)\s+\S+\s+AS)\b",
+    re.IGNORECASE,
+)
+
+_stack = []  # names of the open stages in this process
+_counters = []  # callables returning {name: running total}, recorded per stage as deltas
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None if it can't be measured)."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is KB on Linux, bytes on macOS
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+    except ImportError:
+        return None
+
+def _cpu_seconds():
+    """CPU time of this process plus its finished child processes (worker pools)."""
+    try:
+        import resource
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        return time.process_time() + children.ru_utime + children.ru_stime
+    except ImportError:
+        return time.process_time()
+
+def register_counters(func):
+    """Adds counters (e.g. db.connection_metrics) whose per-stage change goes in stage events."""
+    _counters.append(func)
+
+def _read_counters():
+    values = {}
+    for func in _counters:
+        values.update(func())
+    return values
+
+def trace_path(run_id=RUN_ID):
+    return os.path.join(TRACE_DIR, f"{run_id}.jsonl")
+
+def emit(event):
+    """Appends one event to this run's trace."""
+    event = {"run_id": RUN_ID, "ts": datetime.now(timezone.utc).isoformat(), "pid": os.getpid(), **event}
+    try:
+        os.makedirs(TRACE_DIR, exist_ok=True)
+        with open(trace_path(), "a") as f:
+            f.write(json.dumps(event, default=str) + "\n")
+    except OSError as e:
+        print(f"⚠️ Could not write trace: {e}")
+
+@contextmanager
+def stage(name, **attrs):
+    """
+    Times a block. The yielded dict can be filled in by the block, e.g.
+    record['rows'] = n; it is written to the trace with the timings.
+    """
+    record = dict(attrs)
+    parent = _stack[-1] if _stack else None
+    _stack.append(name)
+    wall, cpu, counters = time.perf_counter(), _cpu_seconds(), _read_counters()
+    status, error = "ok", None
+    try:
+        yield record
+    except BaseException as e:
+        status, error = "error", f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _stack.pop()
+        record.update({k: round(v - counters.get(k, 0), 4) for k, v in _read_counters().items()})
+        emit({
+            "type": "stage",
+            "name": name,
+            "parent": parent,
+            "status": status,
+            "error": error,
+            "wall_s": round(time.perf_counter() - wall, 4),
+            "cpu_s": round(_cpu_seconds() - cpu, 4),
+            "peak_rss_mb": peak_rss_mb(),
+            **record,
+        })
+
+def traced(name=None):
+    """Decorator form of stage(); the stage is named after the function by default."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name or f"{func.__module__}.{func.__name__}"):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def execute(conn, statement, params=None):
+    """Executes one SQL statement on `conn` and traces it. Returns the row count (or None)."""
+    explain = EXPLAIN_SLOW and EXPLAINABLE.match(statement)
+    wall, cpu = time.perf_counter(), time.process_time()
+    plan, rows = None, None
+    try:
+        if explain:
+            plan = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}"), params or {}).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            rows = plan[0]["Plan"].get("Actual Rows")
+        else:
+            result = conn.execute(text(statement), params or {})
+            rows = result.rowcount if result.rowcount is not None and result.rowcount >= 0 else None
+    except Exception as e:
+        emit({"type": "sql", "stage": _stack[-1] if _stack else None, "statement": statement.strip()[:300],
+              "status": "error", "error": f"{type(e).__name__}: {e}",
+              "wall_s": round(time.perf_counter() - wall, 4)})
+        raise
+
+    elapsed = time.perf_counter() - wall
+    event = {
+        "type": "sql",
+        "stage": _stack[-1] if _stack else None,
+        "statement": statement.strip()[:300],
+        "status": "ok",
+        "rows": rows,
+        "wall_s": round(elapsed, 4),
+        "cpu_s": round(time.process_time() - cpu, 4),
+    }
+    if plan is not None and elapsed >= SLOW_SECONDS:
+        event["plan"] = plan
+        print(f"   🐢 Slow statement ({elapsed:.1f}s), plan saved to {trace_path()}")
+    emit(event)
+    return rows
+
+# --- Reading traces ---------------------------------------------------------
+
+def _runs():
+    if not os.path.isdir(TRACE_DIR):
+        return []
+    return sorted((f[:-len(".jsonl")] for f in os.listdir(TRACE_DIR) if f.endswith(".jsonl")),
+                  key=lambda run: os.path.getmtime(trace_path(run)))
+
+def load_trace(run_id):
+    with open(trace_path(run_id)) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def stage_times(run_id):
+    """{stage name: wall seconds} (summed if a stage ran more than once)."""
+    times = {}
+    for event in load_trace(run_id):
+        if event["type"] == "stage":
+            times[event["name"]] = times.get(event["name"], 0) + event["wall_s"]
+    return times
+
+def summarize(run_id):
+    events = load_trace(run_id)
+    print(f"📈 Run {run_id}")
+    for event in events:
+        if event["type"] != "stage":
+            continue
+        rows = f"{event['rows']:,} rows" if event.get("rows") is not None else ""
+        rss = f"{event['peak_rss_mb']:,.0f} MB" if event.get("peak_rss_mb") is not None else "n/a"
+        flag = "✅" if event["status"] == "ok" else "❌"
+        db = f"  {event['db_connects']:.0f} conn / {event['db_checkouts']:.0f} checkouts" if event.get("db_checkouts") else ""
+        print(f"   {flag} {event['name']:<45} {event['wall_s']:>8.2f}s wall {event['cpu_s']:>8.2f}s cpu  "
+              f"peak RSS {rss:>8}  {rows}{db}")
+    statements = sorted((e for e in events if e["type"] == "sql"), key=lambda e: -e["wall_s"])[:5]
+    if statements:
+        print("   Slowest statements:")
+        for event in statements:
+            print(f"   {event['wall_s']:>8.2f}s  {' '.join(event['statement'].split())[:90]}")
+
+def compare(run_id, baseline):
+    current, before = stage_times(run_id), stage_times(baseline)
+    print(f"📈 Run {run_id} vs {baseline}")
+    for name, seconds in current.items():
+        if name in before and before[name] > 0:
+            change = (seconds - before[name]) / before[name] * 100
+            flag = "⚠️" if change > 20 else "  "
+            print(f" {flag} {name:<45} {before[name]:>8.2f}s -> {seconds:>8.2f}s ({change:+.0f}%)")
+        else:
+            print(f"    {name:<45} {'-':>8} -> {seconds:>8.2f}s")
+
+if __name__ == "__main__":
+    runs = _runs()
+    if not runs:
+        print(f"❌ No traces in '{TRACE_DIR}/'.")
+    elif len(sys.argv) > 1 and sys.argv[1] == "compare":
+        if len(runs) < 2:
+            print("❌ Need two runs to compare.")
+        else:
+            compare(runs[-1], runs[-2])
+    else:
+        summarize(sys.argv[1] if len(sys.argv) > 1 else runs[-1])
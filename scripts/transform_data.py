@@ -1,166 +1,562 @@
-from sqlalchemy import create_engine, text
+import argparse
+import hashlib
+import json
+import sys
+import time
+from sqlalchemy import inspect, text
 import config
+import db
+import telemetry
 
-def run_query(query_text, engine):
-    """Executes a list of SQL statements separated by semicolons."""
+def _execute(conn, query_text, params=None):
+    """Executes semicolon-separated statements on an open connection."""
     statements = [s.strip() for s in query_text.split(';') if s.strip()]
+    for stmt in statements:
+        print(f"Executing: {stmt[:50]}...")
+        stmt_params = {k: v for k, v in (params or {}).items() if f":{k}" in stmt}
+        telemetry.execute(conn, stmt, stmt_params)
+
+def run_query(query_text, engine, params=None):
+    """Executes a list of SQL statements separated by semicolons."""
     with engine.begin() as conn:  # Transactional context
-        for stmt in statements:
-            print(f"Executing: {stmt[:50]}...")
-            conn.execute(text(stmt))
+        _execute(conn, query_text, params)
     print("Query set executed.\n")
 
-def transform():
-    print("🚀 Starting SQL Transformations & Analytics...")
-    
-    try:
-        engine = create_engine(config.DATABASE_URL)
-    except Exception as e:
-        print(f"❌ DB Connection Failed: {e}")
-        return
-
-    # 1. Cleaner: Create a unified 'clean_listings' table
-    # Standardizing for NYC Market
-    clean_sql = """
-    DROP TABLE IF EXISTS clean_listings;
-    
-    CREATE TABLE clean_listings AS
-    SELECT 
-        'NYC' as city,
-        id,
-        name,
-        neighbourhood_cleansed as neighbourhood,
-        latitude,
-        longitude,
-        property_type,
-        room_type,
-        accommodates,
-        CAST(NULLIF(regexp_replace(price, '[^0-9.]', '', 'g'), '') AS FLOAT) as price_clean,
-        COALESCE(minimum_nights, 1) as minimum_nights,
-        COALESCE(number_of_reviews, 0) as reviews,
-        COALESCE(review_scores_rating, 0) as rating,
-        COALESCE(reviews_per_month, 0) as reviews_per_month
-    FROM raw_listings_nyc;
-    """
-    
-    # 2. Yield Analysis (Sensitivity Modeling)
-    # Replacing "Approximations" with Scenarios: Bear(40%), Base(60%), Bull(80%)
-    yield_sql = """
-    DROP TABLE IF EXISTS yield_analysis;
-    
-    CREATE TABLE yield_analysis AS
-    SELECT 
+# Spatial Cells (written into clean_listings, rolled up in 'cell_stats')
+# Each listing gets the map tile (Web Mercator x/y, as used by slippy maps) it
+# falls in at CELL_MAX_ZOOM. Tiles nest, so the cell at a coarser zoom z is
+# (cell_x >> (CELL_MAX_ZOOM - z), cell_y >> (CELL_MAX_ZOOM - z)).
+# Zoom 16 tiles are ~460m wide at NYC's latitude, zoom 12 ~7.4km.
+CELL_MAX_ZOOM = 16
+CELL_ZOOMS = [10, 12, 14, 16]
+
+CELL_COLUMNS_SQL = f"""
+    FLOOR((longitude + 180) / 360 * {2 ** CELL_MAX_ZOOM})::INT as cell_x,
+    FLOOR((1 - LN(TAN(RADIANS(latitude)) + 1 / COS(RADIANS(latitude))) / PI()) / 2 * {2 ** CELL_MAX_ZOOM})::INT as cell_y
+"""
+
+# 1. Cleaner: Create a unified 'clean_listings' table
+# Standardizing for NYC Market
+CLEAN_COLUMNS_SQL = f"""
+    'NYC' as city,
+    id,
+    name,
+    neighbourhood_cleansed as neighbourhood,
+    latitude,
+    longitude,
+    property_type,
+    room_type,
+    accommodates,
+    CAST(NULLIF(regexp_replace(price, '[^0-9.]', '', 'g'), '') AS FLOAT) as price_clean,
+    COALESCE(minimum_nights, 1) as minimum_nights,
+    COALESCE(number_of_reviews, 0) as reviews,
+    COALESCE(review_scores_rating, 0) as rating,
+    COALESCE(reviews_per_month, 0) as reviews_per_month,
+    {CELL_COLUMNS_SQL}
+"""
+
+# 1.1 Outlier Detection (Statistical IQR Method)
+# Why? To ensure analysis is based on valid data distributions, not skewed by extremes
+#
+# The quartiles come from 'price_sketch', a mergeable quantile sketch of
+# price_clean per city/neighbourhood/room_type (same log buckets as
+# experiments/sketches.py): bucket b counts the prices in
+# (GAMMA^(b-1), GAMMA^b] and is read back as 2 * GAMMA^b / (GAMMA + 1), so a
+# sketch quartile is within SKETCH_ACCURACY (1%) of the exact-rank price.
+# Merging groups is a SUM of counts: the bounds cost O(groups x buckets), no
+# sort over every listing, and delta runs only add/retract the changed rows.
+SKETCH_ACCURACY = 0.01
+SKETCH_GAMMA = (1 + SKETCH_ACCURACY) / (1 - SKETCH_ACCURACY)
+
+def sketch_rows_sql(source, where="TRUE", sign=1):
+    """Sketch rows (bucket counts per city/neighbourhood/room_type) of price_clean in `source`."""
+    return f"""
+SELECT
+    city,
+    neighbourhood,
+    room_type,
+    CEIL(LN(price_clean) / LN({SKETCH_GAMMA}))::INT as bucket,
+    {sign} * COUNT(*) as listings
+FROM {source}
+WHERE price_clean > 0 AND {where}
+GROUP BY 1, 2, 3, 4
+"""
+
+def _sketch_value(bucket_expr):
+    return f"2 * POWER({SKETCH_GAMMA}, {bucket_expr}) / ({SKETCH_GAMMA} + 1)"
+
+def city_stats_cte(sketch):
+    """Per-city IQR bounds of price_clean, merged from the sketch rows in `sketch`."""
+    return f"""
+city_buckets AS (
+    SELECT city, bucket, SUM(listings) as listings
+    FROM {sketch}
+    GROUP BY city, bucket
+),
+city_ranks AS (
+    SELECT
         city,
-        neighbourhood,
-        id,
-        price_clean,
-        -- RevPAR = Price * Occupancy Rate
-        (price_clean * 365 * 0.40) as revenue_bear,
-        (price_clean * 365 * 0.60) as revenue_base,
-        (price_clean * 365 * 0.80) as revenue_bull
-    FROM clean_listings
-    WHERE price_clean > 0;
-    """
-    
-    # 3. Aggregation: Create 'neighbourhood_stats'
-    stats_sql = """
-    DROP TABLE IF EXISTS neighbourhood_stats;
-    
-    CREATE TABLE neighbourhood_stats AS
-    SELECT 
+        bucket,
+        SUM(listings) OVER (PARTITION BY city ORDER BY bucket) as cumulative,
+        SUM(listings) OVER (PARTITION BY city) as total
+    FROM city_buckets
+),
+city_stats AS (
+    SELECT
         city,
-        neighbourhood,
-        COUNT(*) as total_listings,
-        AVG(price_clean) as avg_price,
-        AVG(revenue_base) as avg_annual_revenue, -- Using Base case for general reporting
-        AVG(rating) as avg_rating
-    FROM yield_analysis
-    JOIN clean_listings USING(id, city, neighbourhood, price_clean)
-    GROUP BY city, neighbourhood;
-    """
+        {_sketch_value('MIN(bucket) FILTER (WHERE cumulative > 0.25 * (total - 1))')} as p25,
+        {_sketch_value('MIN(bucket) FILTER (WHERE cumulative > 0.75 * (total - 1))')} as p75
+    FROM city_ranks
+    GROUP BY city
+)
+"""
 
-    print("Step 1: Cleaning & Unifying Schemas...")
-    run_query(clean_sql, engine)
-
-    # 1.1 Outlier Detection (Statistical IQR Method)
-    # Why? To ensure analysis is based on valid data distributions, not skewed by extremes
-    print("Step 1.1: Detecting Statistical Outliers (IQR Method)...")
-    outlier_sql = """
-    ALTER TABLE clean_listings ADD COLUMN is_outlier BOOLEAN DEFAULT FALSE;
-
-    WITH city_stats AS (
-        SELECT 
-            city,
-            percentile_cont(0.25) WITHIN GROUP (ORDER BY price_clean) as p25,
-            percentile_cont(0.75) WITHIN GROUP (ORDER BY price_clean) as p75
-        FROM clean_listings
-        WHERE price_clean > 0
-        GROUP BY city
-    )
-    UPDATE clean_listings cl
-    SET is_outlier = TRUE
-    FROM city_stats cs
-    WHERE cl.city = cs.city
-    AND (
-        cl.price_clean < (cs.p25 - 1.5 * (cs.p75 - cs.p25)) OR 
-        cl.price_clean > (cs.p75 + 1.5 * (cs.p75 - cs.p25))
-    );
-    """
-    run_query(outlier_sql, engine)
-    
-    print("Step 2: Conducting Yield Analysis (Sensitivity Modeling)...")
-    # Updated to exclude outliers from financial projections
-    # Added RevPAR and Occupancy Rate calculations
-    yield_sql_updated = """
-    DROP TABLE IF EXISTS yield_analysis;
-    
-    CREATE TABLE yield_analysis AS
-    SELECT 
-        city,
-        neighbourhood,
-        id,
-        price_clean,
-        -- Occupancy Rate Estimation (Heuristic: 50% review rate, min stay)
-        -- Formula: (Reviews/Month / 0.5) * Min_Nights / 30
-        -- We cap it at 0.70 (70%) to be conservative and realistic
-        LEAST(
-            (reviews_per_month / 0.5) * minimum_nights / 30.0, 
-            0.70
-        ) as occupancy_rate,
-        
-        -- RevPAR = Price * Occupancy
-        (price_clean * LEAST((reviews_per_month / 0.5) * minimum_nights / 30.0, 0.70)) as revpar,
-
-        (price_clean * 365 * 0.40) as revenue_bear,
-        (price_clean * 365 * 0.60) as revenue_base,
-        (price_clean * 365 * 0.80) as revenue_bull
-    FROM clean_listings
-    WHERE price_clean > 0 AND is_outlier = FALSE;
-    """
-    run_query(yield_sql_updated, engine)
-    
-    # 2.1 Seasonality Analysis
-    print("Step 2.1: Analyzing Seasonality (Calendar Data)...")
-    seasonality_sql = """
-    DROP TABLE IF EXISTS seasonality_stats;
-    CREATE TABLE seasonality_stats AS
+IS_OUTLIER_SQL = """
+COALESCE(
+    cl.price_clean < (cs.p25 - 1.5 * (cs.p75 - cs.p25)) OR
+    cl.price_clean > (cs.p75 + 1.5 * (cs.p75 - cs.p25)),
+    FALSE
+)
+"""
+
+# Single pass over raw_listings_nyc: price is parsed once, the city bounds
+# come from a sketch of the parsed rows and is_outlier is written by the same
+# statement (no ALTER TABLE + UPDATE rewriting every tuple afterwards).
+CLEAN_SELECT_SQL = f"""
+WITH parsed AS (
+    SELECT {CLEAN_COLUMNS_SQL}
+    FROM raw_listings_nyc
+),
+sketch AS ({sketch_rows_sql('parsed')}),
+{city_stats_cte('sketch')}
+SELECT
+    cl.*,
+    {IS_OUTLIER_SQL} as is_outlier
+FROM parsed cl
+LEFT JOIN city_stats cs ON cl.city = cs.city
+"""
+
+# The stored sketch (for delta runs) is rebuilt from the already parsed
+# clean_listings rows.
+price_sketch_sql = f"""
+DROP TABLE IF EXISTS price_sketch;
+
+CREATE TABLE price_sketch AS
+{sketch_rows_sql('clean_listings')};
+"""
+
+# CASCADE: a schema change (new columns) rebuilds the table, and the views on
+# top of it are recreated by their own steps.
+clean_sql = f"""
+DROP TABLE IF EXISTS clean_listings CASCADE;
+
+CREATE TABLE clean_listings AS
+{CLEAN_SELECT_SQL};
+""" + price_sketch_sql
+
+# Once clean_listings exists the materialized views below depend on it, so a
+# full rebuild refills it in place instead of dropping it. TRUNCATE (not
+# DELETE) so the old rows don't stay behind as dead tuples; it runs in the
+# step's transaction and takes the same lock the DROP/CREATE path does.
+clean_reload_sql = f"""
+TRUNCATE clean_listings;
+
+INSERT INTO clean_listings
+{CLEAN_SELECT_SQL};
+""" + price_sketch_sql
+
+# Delta path: only listings touched by loads newer than :since (or deleted
+# from the raw table) are rebuilt. Their old rows are retracted from
+# price_sketch and their new rows added, then the sketch is compacted.
+# transform_changed_ids holds their ids while the step runs. Finally every
+# listing whose outlier flag flips because the city bounds moved is updated.
+clean_delta_sql = f"""
+CREATE TABLE IF NOT EXISTS transform_changed_ids (id BIGINT PRIMARY KEY);
+TRUNCATE transform_changed_ids;
+
+INSERT INTO transform_changed_ids
+SELECT id FROM raw_listings_nyc WHERE _load_id > :since
+UNION
+SELECT c.id FROM clean_listings c
+WHERE NOT EXISTS (SELECT 1 FROM raw_listings_nyc r WHERE r.id = c.id);
+
+INSERT INTO price_sketch
+{sketch_rows_sql('clean_listings', 'id IN (SELECT id FROM transform_changed_ids)', sign=-1)};
+
+DELETE FROM clean_listings WHERE id IN (SELECT id FROM transform_changed_ids);
+
+INSERT INTO clean_listings
+SELECT {CLEAN_COLUMNS_SQL}, FALSE as is_outlier
+FROM raw_listings_nyc
+WHERE id IN (SELECT id FROM transform_changed_ids);
+
+INSERT INTO price_sketch
+{sketch_rows_sql('clean_listings', 'id IN (SELECT id FROM transform_changed_ids)')};
+
+WITH old AS (
+    DELETE FROM price_sketch RETURNING *
+)
+INSERT INTO price_sketch
+SELECT city, neighbourhood, room_type, bucket, SUM(listings)
+FROM old
+GROUP BY 1, 2, 3, 4
+HAVING SUM(listings) <> 0;
+
+WITH {city_stats_cte('price_sketch')}
+UPDATE clean_listings cl
+SET is_outlier = {IS_OUTLIER_SQL}
+FROM city_stats cs
+WHERE cl.city = cs.city
+AND cl.is_outlier IS DISTINCT FROM {IS_OUTLIER_SQL};
+"""
+
+# 2. Yield Analysis (Sensitivity Modeling)
+# Excludes outliers from financial projections.
+# Scenarios: Bear(40%), Base(60%), Bull(80%) plus RevPAR and Occupancy Rate.
+# The parameters live in config.py so experiments/yield_engine.py can replay
+# (and vary) the same model without rebuilding the table.
+OCCUPANCY_SQL = f"LEAST((reviews_per_month / {config.REVIEW_RATE}) * minimum_nights / 30.0, {config.OCCUPANCY_CAP})"
+
+SCENARIO_REVENUE_SQL = ",\n    ".join(
+    f"(price_clean * 365 * {factor}) as revenue_{name}" for name, factor in config.SCENARIO_FACTORS.items()
+)
+
+YIELD_COLUMNS_SQL = f"""
+    city,
+    neighbourhood,
+    id,
+    price_clean,
+    -- Occupancy Rate Estimation (Heuristic: review rate, min stay)
+    -- Formula: (Reviews/Month / REVIEW_RATE) * Min_Nights / 30
+    -- We cap it at OCCUPANCY_CAP to be conservative and realistic
+    {OCCUPANCY_SQL} as occupancy_rate,
+
+    -- RevPAR = Price * Occupancy
+    (price_clean * {OCCUPANCY_SQL}) as revpar,
+
+    -- Sensitivity Scenarios (Bear/Base/Bull)
+    {SCENARIO_REVENUE_SQL}
+"""
+
+yield_query = f"""
+SELECT {YIELD_COLUMNS_SQL}
+FROM clean_listings
+WHERE price_clean > 0 AND is_outlier = FALSE
+"""
+
+# 2.1 Seasonality Analysis (Calendar Data)
+# The loader stores date/available typed and price pre-parsed as price_num,
+# so this reads the partial "available" index instead of re-parsing text.
+# The calendar is partitioned by month, so each partition is aggregated on its own.
+seasonality_sql = """
+SET LOCAL enable_partitionwise_aggregate = on;
+DROP TABLE IF EXISTS seasonality_stats;
+CREATE TABLE seasonality_stats AS
+SELECT
+    TO_CHAR(date, 'YYYY-MM') as month_year,
+    AVG(price_num)::FLOAT as avg_price
+FROM raw_calendar_nyc
+WHERE available
+GROUP BY 1
+ORDER BY 1;
+"""
+
+# 3. Aggregation: 'neighbourhood_stats'
+stats_query = """
+SELECT
+    ya.city,
+    ya.neighbourhood,
+    COUNT(*) as total_listings,
+    AVG(ya.price_clean) as avg_price,
+    AVG(ya.revenue_base) as avg_annual_revenue, -- Using Base case for general reporting
+    AVG(cl.rating) as avg_rating
+FROM yield_analysis ya
+JOIN clean_listings cl ON cl.id = ya.id
+GROUP BY ya.city, ya.neighbourhood
+"""
+
+# 3.1 Spatial Rollups: 'cell_stats'
+# One row per (zoom, x, y) cell for every zoom in CELL_ZOOMS. Listings are
+# summed once per finest cell, and the coarser zooms roll those sums up, so a
+# heatmap at any zoom is an index lookup on (zoom, x, y).
+cell_stats_query = f"""
+WITH finest AS (
     SELECT
-        TO_CHAR(date::DATE, 'YYYY-MM') as month_year,
-        AVG(CAST(NULLIF(regexp_replace(price::TEXT, '[^0-9.]', '', 'g'), '') AS FLOAT)) as avg_price
-    FROM raw_calendar_nyc
-    WHERE available = 't'
-    GROUP BY 1
-    ORDER BY 1;
+        cl.city,
+        cl.cell_x,
+        cl.cell_y,
+        COUNT(*) as listings,
+        SUM(ya.revpar) as revpar_sum,
+        SUM(ya.revenue_base) as revenue_sum,
+        SUM(ya.price_clean) as price_sum,
+        SUM(ya.occupancy_rate) as occupancy_sum
+    FROM yield_analysis ya
+    JOIN clean_listings cl ON cl.id = ya.id
+    WHERE cl.cell_x IS NOT NULL AND cl.cell_y IS NOT NULL
+    GROUP BY cl.city, cl.cell_x, cl.cell_y
+)
+SELECT
+    z.zoom,
+    f.city,
+    f.cell_x >> ({CELL_MAX_ZOOM} - z.zoom) as x,
+    f.cell_y >> ({CELL_MAX_ZOOM} - z.zoom) as y,
+    SUM(f.listings)::INT as listings,
+    SUM(f.revpar_sum) / SUM(f.listings) as avg_revpar,
+    SUM(f.revenue_sum) / SUM(f.listings) as avg_annual_revenue,
+    SUM(f.revenue_sum) as total_annual_revenue,
+    SUM(f.price_sum) / SUM(f.listings) as avg_price,
+    SUM(f.occupancy_sum) / SUM(f.listings) as avg_occupancy
+FROM finest f
+CROSS JOIN (VALUES {', '.join(f'({z})' for z in CELL_ZOOMS)}) as z(zoom)
+GROUP BY 1, 2, 3, 4
+"""
+
+# yield_analysis, neighbourhood_stats and cell_stats are materialized views
+# with a unique index, refreshed CONCURRENTLY: readers (dashboards, export_extended.py)
+# keep seeing the previous contents until the refresh commits.
+# The view is tagged with a hash of its query (COMMENT), so a changed
+# definition (e.g. new yield parameters in config.py) recreates it.
+def matview_sql(name, query, unique_columns, exists, replace=False):
+    """SQL that creates the materialized view on first run and refreshes it afterwards."""
+    if exists and not replace:
+        return f"REFRESH MATERIALIZED VIEW CONCURRENTLY {name};"
+    drop = "MATERIALIZED VIEW" if exists else "TABLE"
+    return f"""
+DROP {drop} IF EXISTS {name} CASCADE;
+CREATE MATERIALIZED VIEW {name} AS {query};
+CREATE UNIQUE INDEX {name}_key_idx ON {name} ({', '.join(unique_columns)});
+COMMENT ON MATERIALIZED VIEW {name} IS '{_definition_hash(query)}';
+"""
+
+def _definition_hash(query):
+    return hashlib.sha1(query.encode()).hexdigest()
+
+# --- Dependency-aware Step Runner -----------------------------------------
+# Each step declares the tables it reads and writes. A step is skipped when
+# the versions of its inputs match those recorded on its last successful run.
+# Raw table versions come from load_manifest (latest load_id); derived table
+# versions are the output_version of the step that wrote them.
+# Only clean_listings (with price_sketch) has a delta path. The steps below it
+# are materialized views, which can only be refreshed as a whole: a
+# CONCURRENTLY refresh recomputes the query and writes just the rows that
+# differ, so readers never block, but the work is not limited to the changed
+# listings. That is deliberate: non-blocking reads over per-row deltas.
+STEPS = [
+    {
+        'name': 'clean_listings',
+        'label': "Step 1: Cleaning & Unifying Schemas (with IQR Outlier Detection)...",
+        'inputs': ['raw_listings_nyc'],
+        'outputs': ['clean_listings', 'price_sketch'],
+        'sql': clean_sql,
+        'reload_sql': clean_reload_sql,
+        'delta_sql': clean_delta_sql,
+        # Column shape of the table, to detect schema changes
+        'select': f"SELECT {CLEAN_COLUMNS_SQL}, FALSE as is_outlier FROM raw_listings_nyc",
+    },
+    {
+        'name': 'yield_analysis',
+        'label': "Step 2: Conducting Yield Analysis (Sensitivity Modeling)...",
+        'inputs': ['clean_listings'],
+        'outputs': ['yield_analysis'],
+        'matview': (yield_query, ['id']),
+    },
+    {
+        'name': 'seasonality_stats',
+        'label': "Step 2.1: Analyzing Seasonality (Calendar Data)...",
+        'inputs': ['raw_calendar_nyc'],
+        'outputs': ['seasonality_stats'],
+        'sql': seasonality_sql,
+        'optional': True,
+    },
+    {
+        'name': 'neighbourhood_stats',
+        'label': "Step 3: Aggregating Neighborhood Statistics...",
+        'inputs': ['yield_analysis', 'clean_listings'],
+        'outputs': ['neighbourhood_stats'],
+        'matview': (stats_query, ['city', 'neighbourhood']),
+    },
+    {
+        'name': 'cell_stats',
+        'label': "Step 3.1: Rolling Up Yield by Map Cell (multi-zoom)...",
+        'inputs': ['yield_analysis', 'clean_listings'],
+        'outputs': ['cell_stats'],
+        'matview': (cell_stats_query, ['zoom', 'city', 'x', 'y']),
+    },
+]
+
+STATE_SQL = """
+CREATE TABLE IF NOT EXISTS transform_state (
+    step TEXT PRIMARY KEY,
+    input_versions TEXT,
+    output_version INTEGER,
+    ran_at TIMESTAMPTZ DEFAULT now()
+)
+"""
+
+def _load_state(engine):
+    with engine.begin() as conn:
+        conn.execute(text(STATE_SQL))
+        rows = conn.execute(text("SELECT step, input_versions, output_version FROM transform_state"))
+        return {step: (json.loads(inputs), version) for step, inputs, version in rows}
+
+def _raw_versions(engine):
+    """Latest load_id per raw table (empty if the loader never wrote a manifest)."""
+    if not inspect(engine).has_table('load_manifest'):
+        return {}
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT table_name, MAX(load_id) FROM load_manifest GROUP BY table_name"))
+        return dict(rows.fetchall())
+
+def _table_version(table, state, raw_versions):
+    for step in STEPS:
+        if table in step['outputs']:
+            return state.get(step['name'], (None, None))[1]
+    return raw_versions.get(table)
+
+def _relation_kind(engine, name):
+    """pg_class.relkind of a table/view ('r', 'p', 'm', ...) or None if it doesn't exist."""
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:t)"), {'t': name}).scalar()
+
+def _definition_changed(step, engine):
+    """True if the step's materialized view exists but was built from a different query."""
+    if 'matview' not in step or _relation_kind(engine, step['name']) != 'm':
+        return False
+    with engine.connect() as conn:
+        tag = conn.execute(text("SELECT obj_description(to_regclass(:t), 'pg_class')"), {'t': step['name']}).scalar()
+    return tag != _definition_hash(step['matview'][0])
+
+def _schema_matches(step, engine):
+    """True if the step's existing table has the columns its query now produces."""
+    if 'select' not in step:
+        return True
+    table = step['outputs'][0]
+    with engine.connect() as conn:
+        wanted = list(conn.execute(text(f"SELECT * FROM ({step['select']}) q LIMIT 0")).keys())
+    return [c['name'] for c in inspect(engine).get_columns(table)] == wanted
+
+def _step_sql(step, engine):
+    """Picks the full-rebuild SQL of a step, depending on what already exists."""
+    kind = _relation_kind(engine, step['outputs'][0])
+    if 'matview' in step:
+        query, unique_columns = step['matview']
+        return matview_sql(step['name'], query, unique_columns, exists=(kind == 'm'),
+                           replace=_definition_changed(step, engine))
+    if 'reload_sql' in step and kind in ('r', 'p') and _schema_matches(step, engine):
+        return step['reload_sql']
+    return step['sql']
+
+def _relation_sizes(engine, tables):
+    """pg_total_relation_size (table + indexes + TOAST) per table, None if missing."""
+    with engine.connect() as conn:
+        return {t: conn.execute(text("SELECT pg_total_relation_size(to_regclass(:t))"), {'t': t}).scalar()
+                for t in tables}
+
+def _fmt_size(size):
+    return "-" if size is None else f"{size / (1024 * 1024):,.1f} MB"
+
+def _can_run_delta(step, previous, delta_tables, engine):
     """
+    A delta update needs a previous run and existing outputs. For the first
+    step, the raw input must carry _load_id (incremental loader); downstream
+    steps need their inputs to have been delta-updated in this same run.
+    """
+    if 'delta_sql' not in step or previous is None:
+        return False
+    if not all(_relation_kind(engine, t) for t in step['outputs']):
+        return False
+    if not _schema_matches(step, engine):
+        return False
+    insp = inspect(engine)
+    for table in step['inputs']:
+        if table in delta_tables:
+            continue
+        if any(table in s['outputs'] for s in STEPS):
+            return False
+        if '_load_id' not in [c['name'] for c in insp.get_columns(table)]:
+            return False
+    return True
+
+@telemetry.traced("transform")
+def transform(full_refresh=False):
+    print("🚀 Starting SQL Transformations & Analytics...")
+
     try:
-        run_query(seasonality_sql, engine)
+        engine = db.get_engine()
+        state = _load_state(engine)
+        raw_versions = _raw_versions(engine)
     except Exception as e:
-        print(f"⚠️ Seasonality analysis skipped (Missing calendar data?): {e}")
-    
-    print("Step 3: Aggregating Neighborhood Statistics...")
-    run_query(stats_sql, engine)
-    
+        print(f"❌ DB Connection Failed: {e}")
+        return False
+
+    delta_tables = set()  # outputs updated in delta mode during this run
+
+    for step in STEPS:
+        print(step['label'])
+        name = step['name']
+
+        inputs = {t: _table_version(t, state, raw_versions) for t in step['inputs']}
+        previous = state.get(name)
+        outputs_exist = all(_relation_kind(engine, t) for t in step['outputs'])
+        known = all(v is not None for v in inputs.values())
+
+        if (not full_refresh and previous and known and previous[0] == inputs and outputs_exist
+                and not _definition_changed(step, engine) and _schema_matches(step, engine)):
+            print(f"⏭ Inputs unchanged since last run. Skipping {name}.\n")
+            with telemetry.stage(f"transform.{name}", mode="skip"):
+                pass
+            continue
+
+        delta = not full_refresh and _can_run_delta(step, previous, delta_tables, engine)
+        sizes_before = _relation_sizes(engine, step['outputs'])
+        start = time.perf_counter()
+        try:
+            with telemetry.stage(f"transform.{name}", mode="delta" if delta else "full") as record:
+                with engine.begin() as conn:
+                    if delta:
+                        print("   Applying delta update for changed listings...")
+                        since = (previous[0] or {}).get(step['inputs'][0]) or 0
+                        _execute(conn, step['delta_sql'], {'since': since})
+                    else:
+                        _execute(conn, _step_sql(step, engine))
+
+                    version = ((previous or (None, 0))[1] or 0) + 1
+                    conn.execute(text(STATE_SQL))
+                    conn.execute(text("""
+                        INSERT INTO transform_state (step, input_versions, output_version, ran_at)
+                        VALUES (:step, :inputs, :version, now())
+                        ON CONFLICT (step) DO UPDATE
+                        SET input_versions = EXCLUDED.input_versions,
+                            output_version = EXCLUDED.output_version,
+                            ran_at = EXCLUDED.ran_at
+                    """), {'step': name, 'inputs': json.dumps(inputs), 'version': version})
+                sizes_after = _relation_sizes(engine, step['outputs'])
+                record['bytes'] = sum(sizes_after[t] or 0 for t in step['outputs'])
+            elapsed = time.perf_counter() - start
+            for table in step['outputs']:
+                print(f"   ⏱ {table}: {elapsed:.2f}s, size {_fmt_size(sizes_before[table])} -> {_fmt_size(sizes_after[table])}")
+            print("Query set executed.\n")
+        except Exception as e:
+            if step.get('optional'):
+                print(f"⚠️ {name} skipped (Missing input data?): {e}")
+                continue
+            raise
+
+        state[name] = (inputs, version)
+        if delta:
+            delta_tables.update(step['outputs'])
+
     print("✅ Transformations & Analytics Complete!")
+    return True
 
 if __name__ == "__main__":
-    transform()
+    parser = argparse.ArgumentParser(description="Run the SQL transformation steps.")
+    parser.add_argument("--full", action="store_true", help="ignore recorded state and rebuild every table")
+    parser.add_argument("--backend", choices=["postgres", "duckdb"], default="postgres",
+                        help="'duckdb' runs the steps embedded, over the raw files (see duckdb_backend.py)")
+    args = parser.parse_args()
+    if args.backend == "duckdb":
+        from duckdb_backend import transform as transform_duckdb
+        transform_duckdb().close()
+    else:
+        sys.exit(0 if transform(full_refresh=args.full) else 1)
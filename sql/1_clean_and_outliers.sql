@@ -1,43 +1,89 @@
 -- 1. Cleaner: Create a unified 'clean_listings' table
 -- Standardizing for NYC Market by casting price and handling nulls
-DROP TABLE IF EXISTS clean_listings;
-
-CREATE TABLE clean_listings AS
-SELECT 
-    'NYC' as city,
-    id,
-    name,
-    neighbourhood_cleansed as neighbourhood,
-    latitude,
-    longitude,
-    property_type,
-    room_type,
-    accommodates,
-    CAST(NULLIF(regexp_replace(price, '[^0-9.]', '', 'g'), '') AS FLOAT) as price_clean,
-    COALESCE(minimum_nights, 1) as minimum_nights,
-    COALESCE(number_of_reviews, 0) as reviews,
-    COALESCE(review_scores_rating, 0) as rating,
-    COALESCE(reviews_per_month, 0) as reviews_per_month
-FROM raw_listings_nyc;
-
 -- 1.1 Outlier Detection (Statistical IQR Method)
 -- Why? To ensure analysis is based on valid data distributions, not skewed by extremes
-ALTER TABLE clean_listings ADD COLUMN is_outlier BOOLEAN DEFAULT FALSE;
+-- The quartiles come from 'price_sketch', a mergeable quantile sketch of price per
+-- city/neighbourhood/room_type: bucket b counts prices in (g^(b-1), g^b] with
+-- g = 1.01/0.99 and reads back as 2*g^b/(g+1), i.e. within 1% of the exact quartile.
+-- Merging groups is a SUM of counts, so no sort over every listing is needed.
+-- Single pass: price is parsed once, the bounds come from a sketch of the parsed rows and
+-- is_outlier is written by the CREATE TABLE AS itself (no ALTER + UPDATE rewrite).
+-- The sketch is then stored from clean_listings.
+DROP TABLE IF EXISTS clean_listings CASCADE;
 
-WITH city_stats AS (
-    SELECT 
+CREATE TABLE clean_listings AS
+WITH parsed AS (
+    SELECT
+        'NYC' as city,
+        id,
+        name,
+        neighbourhood_cleansed as neighbourhood,
+        latitude,
+        longitude,
+        property_type,
+        room_type,
+        accommodates,
+        CAST(NULLIF(regexp_replace(price, '[^0-9.]', '', 'g'), '') AS FLOAT) as price_clean,
+        COALESCE(minimum_nights, 1) as minimum_nights,
+        COALESCE(number_of_reviews, 0) as reviews,
+        COALESCE(review_scores_rating, 0) as rating,
+        COALESCE(reviews_per_month, 0) as reviews_per_month,
+        -- Map tile (Web Mercator) at zoom 16; coarser cells are cell_x >> n, cell_y >> n
+        FLOOR((longitude + 180) / 360 * 65536)::INT as cell_x,
+        FLOOR((1 - LN(TAN(RADIANS(latitude)) + 1 / COS(RADIANS(latitude))) / PI()) / 2 * 65536)::INT as cell_y
+    FROM raw_listings_nyc
+),
+sketch AS (
+    SELECT
         city,
-        percentile_cont(0.25) WITHIN GROUP (ORDER BY price_clean) as p25,
-        percentile_cont(0.75) WITHIN GROUP (ORDER BY price_clean) as p75
-    FROM clean_listings
+        neighbourhood,
+        room_type,
+        CEIL(LN(price_clean) / LN(1.02020202020202))::INT as bucket,
+        COUNT(*) as listings
+    FROM parsed
     WHERE price_clean > 0
+    GROUP BY 1, 2, 3, 4
+),
+city_buckets AS (
+    SELECT city, bucket, SUM(listings) as listings
+    FROM sketch
+    GROUP BY city, bucket
+),
+city_ranks AS (
+    SELECT
+        city,
+        bucket,
+        SUM(listings) OVER (PARTITION BY city ORDER BY bucket) as cumulative,
+        SUM(listings) OVER (PARTITION BY city) as total
+    FROM city_buckets
+),
+city_stats AS (
+    SELECT
+        city,
+        2 * POWER(1.02020202020202, MIN(bucket) FILTER (WHERE cumulative > 0.25 * (total - 1))) / 2.02020202020202 as p25,
+        2 * POWER(1.02020202020202, MIN(bucket) FILTER (WHERE cumulative > 0.75 * (total - 1))) / 2.02020202020202 as p75
+    FROM city_ranks
     GROUP BY city
 )
-UPDATE clean_listings cl
-SET is_outlier = TRUE
-FROM city_stats cs
-WHERE cl.city = cs.city
-AND (
-    cl.price_clean < (cs.p25 - 1.5 * (cs.p75 - cs.p25)) OR 
-    cl.price_clean > (cs.p75 + 1.5 * (cs.p75 - cs.p25))
-);
+SELECT
+    cl.*,
+    COALESCE(
+        cl.price_clean < (cs.p25 - 1.5 * (cs.p75 - cs.p25)) OR
+        cl.price_clean > (cs.p75 + 1.5 * (cs.p75 - cs.p25)),
+        FALSE
+    ) as is_outlier
+FROM parsed cl
+LEFT JOIN city_stats cs ON cl.city = cs.city;
+
+DROP TABLE IF EXISTS price_sketch;
+
+CREATE TABLE price_sketch AS
+SELECT
+    city,
+    neighbourhood,
+    room_type,
+    CEIL(LN(price_clean) / LN(1.02020202020202))::INT as bucket,
+    COUNT(*) as listings
+FROM clean_listings
+WHERE price_clean > 0
+GROUP BY 1, 2, 3, 4;
@@ -1,8 +1,12 @@
 -- 2. Yield Analysis (Sensitivity Modeling)
 -- Purpose: Calculate RevPAR and projected revenue based on occupancy assumptions.
-DROP TABLE IF EXISTS yield_analysis;
+-- The 0.5 review rate, 0.70 cap and 0.40/0.60/0.80 factors are the defaults in
+-- scripts/config.py; experiments/yield_engine.py evaluates other values in NumPy.
+-- Materialized view with a unique index, so later runs can use
+-- REFRESH MATERIALIZED VIEW CONCURRENTLY yield_analysis; without blocking readers.
+DROP MATERIALIZED VIEW IF EXISTS yield_analysis CASCADE;
 
-CREATE TABLE yield_analysis AS
+CREATE MATERIALIZED VIEW yield_analysis AS
 SELECT 
     city,
     neighbourhood,
@@ -26,14 +30,17 @@ SELECT
 FROM clean_listings
 WHERE price_clean > 0 AND is_outlier = FALSE;
 
+CREATE UNIQUE INDEX yield_analysis_key_idx ON yield_analysis (id);
+
 -- 2.1 Seasonality Analysis
 -- Analyzing average price trends by month
+-- Uses the typed date/available columns and the pre-parsed price_num written by the loader
 DROP TABLE IF EXISTS seasonality_stats;
 CREATE TABLE seasonality_stats AS
 SELECT
-    TO_CHAR(date::DATE, 'YYYY-MM') as month_year,
-    AVG(CAST(NULLIF(regexp_replace(price::TEXT, '[^0-9.]', '', 'g'), '') AS FLOAT)) as avg_price
+    TO_CHAR(date, 'YYYY-MM') as month_year,
+    AVG(price_num)::FLOAT as avg_price
 FROM raw_calendar_nyc
-WHERE available = 't'
+WHERE available
 GROUP BY 1
 ORDER BY 1;
@@ -0,0 +1,44 @@
+-- 3.1 Spatial Rollups
+-- Purpose: yield per map cell at several zoom levels, for heatmaps.
+-- clean_listings carries the zoom-16 Web Mercator tile of each listing (cell_x, cell_y);
+-- tiles nest, so the zoom-z cell is (cell_x >> (16 - z), cell_y >> (16 - z)).
+-- Listings are summed once per zoom-16 cell and the coarser zooms roll those sums up.
+-- The unique index makes a heatmap at any zoom an index lookup on (zoom, x, y).
+DROP MATERIALIZED VIEW IF EXISTS cell_stats;
+
+CREATE MATERIALIZED VIEW cell_stats AS
+WITH finest AS (
+    SELECT
+        cl.city,
+        cl.cell_x,
+        cl.cell_y,
+        COUNT(*) as listings,
+        SUM(ya.revpar) as revpar_sum,
+        SUM(ya.revenue_base) as revenue_sum,
+        SUM(ya.price_clean) as price_sum,
+        SUM(ya.occupancy_rate) as occupancy_sum
+    FROM yield_analysis ya
+    JOIN clean_listings cl ON cl.id = ya.id
+    WHERE cl.cell_x IS NOT NULL AND cl.cell_y IS NOT NULL
+    GROUP BY cl.city, cl.cell_x, cl.cell_y
+)
+SELECT
+    z.zoom,
+    f.city,
+    f.cell_x >> (16 - z.zoom) as x,
+    f.cell_y >> (16 - z.zoom) as y,
+    SUM(f.listings)::INT as listings,
+    SUM(f.revpar_sum) / SUM(f.listings) as avg_revpar,
+    SUM(f.revenue_sum) / SUM(f.listings) as avg_annual_revenue,
+    SUM(f.revenue_sum) as total_annual_revenue,
+    SUM(f.price_sum) / SUM(f.listings) as avg_price,
+    SUM(f.occupancy_sum) / SUM(f.listings) as avg_occupancy
+FROM finest f
+CROSS JOIN (VALUES (10), (12), (14), (16)) as z(zoom)
+GROUP BY 1, 2, 3, 4;
+
+CREATE UNIQUE INDEX cell_stats_key_idx ON cell_stats (zoom, city, x, y);
+
+-- Example: zoom-14 heatmap of a bounding box
+-- SELECT x, y, listings, avg_revpar FROM cell_stats
+-- WHERE zoom = 14 AND city = 'NYC' AND x BETWEEN 4820 AND 4830 AND y BETWEEN 6155 AND 6165;
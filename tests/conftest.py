@@ -0,0 +1,10 @@
+import os
+import sys
+
+# The pipeline modules are flat scripts (run from scripts/ or experiments/),
+# so make both importable the way they import each other.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for directory in ("scripts", "experiments"):
+    path = os.path.join(ROOT, directory)
+    if path not in sys.path:
+        sys.path.insert(0, path)
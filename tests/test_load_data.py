@@ -0,0 +1,41 @@
+import pytest
+
+from load_data import _shard_offsets
+
+HEADER = b"id,name,price\n"
+
+@pytest.fixture
+def csv_file(tmp_path):
+    lines = [f"{i},listing {'x' * (i % 17)},${i * 3}.00\n".encode() for i in range(200)]
+    path = tmp_path / "listings.csv"
+    path.write_bytes(HEADER + b"".join(lines))
+    return path
+
+@pytest.mark.parametrize("shard_bytes", [1, 7, 64, 1000, 10 ** 9])
+def test_shards_are_contiguous_line_aligned_ranges(csv_file, shard_bytes):
+    data = csv_file.read_bytes()
+    offsets = _shard_offsets(str(csv_file), shard_bytes)
+
+    assert offsets[0][0] == len(HEADER)
+    assert offsets[-1][1] == len(data)
+    for (start, end), (next_start, _) in zip(offsets, offsets[1:]):
+        assert end == next_start
+    for start, end in offsets:
+        assert start < end
+        assert data[start - 1:start] == b"\n"
+        assert data[end - 1:end] == b"\n"
+    assert b"".join(data[start:end] for start, end in offsets) == data[len(HEADER):]
+
+def test_one_shard_when_shard_size_exceeds_file(csv_file):
+    assert _shard_offsets(str(csv_file), 10 ** 9) == [(len(HEADER), csv_file.stat().st_size)]
+
+def test_last_line_without_newline(tmp_path):
+    path = tmp_path / "calendar.csv"
+    path.write_bytes(HEADER + b"1,a,$1\n2,b,$2")
+    offsets = _shard_offsets(str(path), 4)
+    assert offsets == [(len(HEADER), len(HEADER) + 7), (len(HEADER) + 7, path.stat().st_size)]
+
+def test_header_only_file_has_no_shards(tmp_path):
+    path = tmp_path / "empty.csv"
+    path.write_bytes(HEADER)
+    assert _shard_offsets(str(path), 64) == []
@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+import model_store
+from model_store import EncodedModel, data_key
+
+FEATURES = ['room_type', 'accommodates']
+
+@pytest.fixture
+def listings():
+    return pd.DataFrame({
+        'room_type': ['Entire home/apt', 'Private room', 'Shared room', 'Private room', 'Entire home/apt'],
+        'accommodates': [4, 2, 1, 2, 6],
+        'price': [200.0, 90.0, 45.0, 100.0, 320.0],
+    })
+
+def test_data_key_is_stable(listings):
+    key = data_key("price_linear", listings, FEATURES, 'price', {})
+    assert key == data_key("price_linear", listings.copy(), FEATURES, 'price', {})
+    # Columns outside features + target don't matter
+    assert key == data_key("price_linear", listings.assign(rating=4.5), FEATURES, 'price', {})
+
+def test_data_key_changes_with_data_and_spec(listings):
+    key = data_key("price_linear", listings, FEATURES, 'price', {})
+    changed = listings.copy()
+    changed.loc[0, 'price'] = 201.0
+    assert data_key("price_linear", changed, FEATURES, 'price', {}) != key
+    assert data_key("price_ridge", listings, FEATURES, 'price', {}) != key
+    assert data_key("price_linear", listings, FEATURES, 'price', {'alpha': 1.0}) != key
+    assert data_key("price_linear", listings, ['accommodates'], 'price', {}) != key
+
+def test_encoding_uses_the_training_levels(listings):
+    model = EncodedModel(LinearRegression(), FEATURES, model_store._categories(listings, FEATURES))
+    trained = model.encode(listings)
+
+    # A batch with one level only, and one with a level never seen in training
+    single = model.encode(listings[listings['room_type'] == 'Shared room'])
+    unseen = model.encode(pd.DataFrame({'room_type': ['Hotel room'], 'accommodates': [2]}))
+
+    assert list(single.columns) == list(trained.columns) == model.columns
+    assert list(unseen.columns) == model.columns
+    assert single['room_type_Shared room'].tolist() == [1]
+    assert unseen[['room_type_Private room', 'room_type_Shared room']].to_numpy().sum() == 0
+
+def test_fit_or_load_reuses_the_stored_model(listings, tmp_path, monkeypatch):
+    monkeypatch.setattr(model_store, "MODEL_DIR", str(tmp_path))
+    model, meta = model_store.fit_or_load("price_linear", listings, FEATURES, 'price', LinearRegression)
+    again, meta_again = model_store.fit_or_load("price_linear", listings, FEATURES, 'price', LinearRegression)
+
+    assert meta['retrained'] and not meta_again['retrained']
+    assert meta_again['key'] == meta['key']
+    assert again.columns == model.columns
+    pd.testing.assert_series_equal(pd.Series(model_store.predict(again, listings, report=False)),
+                                   pd.Series(model_store.predict(model, listings, report=False)))
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import sketches
+
+QUANTILES = [0.0, 0.05, 0.25, 0.5, 0.75, 0.95, 1.0]
+
+def _values(seed, n=5000):
+    rng = np.random.default_rng(seed)
+    return rng.lognormal(mean=5, sigma=1.2, size=n)
+
+def _exact(values, q):
+    """The value quantile() targets: rank floor(q * (n - 1)) of the sorted values."""
+    ordered = np.sort(values)
+    return ordered[int(np.floor(q * (len(ordered) - 1)))]
+
+def _canonical(sketch, by):
+    return sketch.sort_values(list(by) + ["bucket"]).reset_index(drop=True)
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_quantile_within_relative_accuracy(seed):
+    values = _values(seed)
+    sketch = sketches.build_sketch(np.zeros(len(values), dtype=int), values)
+    for q, estimate in zip(QUANTILES, sketches.quantile(sketch, QUANTILES)):
+        exact = _exact(values, q)
+        assert abs(estimate - exact) <= sketches.RELATIVE_ACCURACY * exact * (1 + 1e-9)
+
+def test_scalar_quantile_and_empty_sketch():
+    sketch = sketches.build_sketch(np.zeros(3, dtype=int), [10.0, 20.0, np.nan])
+    assert isinstance(sketches.quantile(sketch, 0.5), float)
+    empty = sketch.iloc[0:0]
+    assert np.isnan(sketches.quantile(empty, 0.5))
+    assert all(np.isnan(v) for v in sketches.quantile(empty, [0.25, 0.75]))
+
+def test_non_positive_values_share_the_zero_bucket():
+    buckets = sketches.bucketize([-5.0, 0.0, 1.0])
+    assert buckets[0] == buckets[1] == sketches.ZERO_BUCKET
+    assert sketches.bucket_values(buckets[:2]).tolist() == [0.0, 0.0]
+
+def test_merge_is_associative_and_matches_one_sketch():
+    shards = [_values(seed, n=1000) for seed in range(3)]
+    parts = [sketches.build_sketch(pd.DataFrame({"city": ["NYC"] * len(v)}), v) for v in shards]
+
+    left = sketches.merge(pd.concat([sketches.merge(pd.concat(parts[:2]), by=["city"]), parts[2]]), by=["city"])
+    right = sketches.merge(pd.concat([parts[0], sketches.merge(pd.concat(parts[1:]), by=["city"])]), by=["city"])
+    whole = sketches.build_sketch(pd.DataFrame({"city": ["NYC"] * 3000}), np.concatenate(shards))
+
+    pd.testing.assert_frame_equal(_canonical(left, ["city"]), _canonical(right, ["city"]))
+    pd.testing.assert_frame_equal(_canonical(left, ["city"]), _canonical(whole, ["city"]), check_dtype=False)
+
+def test_sketch_codes_matches_build_sketch():
+    rng = np.random.default_rng(7)
+    values = np.concatenate([_values(7, n=2000), [0.0, -1.0, np.nan]])
+    codes = rng.integers(0, 4, size=len(values))
+    fast = sketches.sketch_codes(codes, values, n_groups=4)
+    slow = sketches.build_sketch(pd.Series(codes, name="group"), values)
+    pd.testing.assert_frame_equal(_canonical(fast, ["group"]), _canonical(slow, ["group"]), check_dtype=False)